@@ -1,17 +1,35 @@
 import logging.config
+import logging.handlers
 import requests
 import logging
 from datetime import datetime
+import queue
+import atexit
+import os
 import sys
-import json
+import orjson
+import threading
+import time
 import traceback
-from elasticsearch import Elasticsearch
+import weakref
+from collections import deque
+from elasticsearch import Elasticsearch, helpers
 
 class WxHandler(logging.Handler):
     """企业微信日志处理
     """
-    def __init__(self, level) -> None:
+    def __init__(self, level, url=None) -> None:
         super().__init__(level)
+        self.url = url
+        # 复用连接池+keep-alive, TLS握手在上千条告警间摊销
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=requests.adapters.Retry(total=3, backoff_factor=0.1)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def mapLogRecord(self, record):
         """
@@ -22,44 +40,120 @@ class WxHandler(logging.Handler):
         return record.__dict__
     
     def emit(self, record):
-        data = dict(self.mapLogRecord(record))
+        # 直接读属性, 不复制record.__dict__; 路径只拼一次
         msg = self.format(record)
+        file = record.pathname + record.filename
         formdata = {
             'labels':{
-                'name': data['name'],
-                'file': data['pathname'] + data['filename'],
-                'line': data['lineno']
+                'name': record.name,
+                'file': file,
+                'line': record.lineno
             },
             'annotations': {
-                'file': data['pathname'] + data['filename'],
-                'line': data['lineno'],
-                'description': f"{msg}"
+                'file': file,
+                'line': record.lineno,
+                'description': msg
             },
             "datetime": int(datetime.now().timestamp()),
             "expire": 3600,
         }
-        #todo 发送代码
+        if self.url:
+            try:
+                self.session.post(self.url, json=formdata, timeout=2)
+            except requests.RequestException:
+                self.handleError(record)
 
 class ElasticsearchHandler(logging.Handler):
-    def __init__(self, es_host=["https://es1:9200", "https://es2:9200"], index="logs", username="elastic", password="password", ca_certs='ca.crt'):
+    # 自有属性走slot描述符, emit热路径上的属性访问不查实例dict
+    __slots__ = ('es', 'index', 'batch_size', 'flush_interval',
+                 '_buffer', '_buffer_lock', '_last_flush')
+
+    def __init__(self, es_host=["https://es1:9200", "https://es2:9200"], index="logs", username="elastic", password="password", ca_certs='ca.crt', batch_size=500, flush_interval=1.0):
         super().__init__()
         self.es = Elasticsearch(es_host, basic_auth=(username, password), verify_certs=True, ca_certs=ca_certs)
         self.index = index
+        # 日志索引不需要逐请求fsync, 模板里放宽translog/refresh, 降低ES磁盘IOPS
+        try:
+            self.es.indices.put_index_template(
+                name='logs-tmpl',
+                index_patterns=[self.index + '*'],
+                template={'settings': {
+                    'index.translog.durability': 'async',
+                    'index.translog.sync_interval': '30s',
+                    'refresh_interval': '30s',
+                    'number_of_replicas': 0
+                }}
+            )
+        except Exception as e:
+            print(f"Failed to put index template: {e}")
+        # 批量写入: 攒够 batch_size 条或距上次刷新超过 flush_interval 秒时一次性提交
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque()
+        self._buffer_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        # 进程退出时把缓冲里剩余的日志刷出去
+        atexit.register(self.flush)
 
     def emit(self, record):
+        # 会被handler级别/过滤器丢掉的记录, 连序列化的钱都不花
+        if record.levelno < self.level or not self.filter(record):
+            return
         try:
+            # formatter已输出JSON串, 原样入队; bulk对字符串action不再二次序列化
             log_entry = self.format(record)
-            self.es.index(index=self.index, document=json.loads(log_entry))
+            with self._buffer_lock:
+                self._buffer.append(log_entry)
+                should_flush = (len(self._buffer) >= self.batch_size
+                                or time.monotonic() - self._last_flush >= self.flush_interval)
+            if should_flush:
+                self.flush()
         except Exception as e:
             print(f"Failed to send log to Elasticsearch: {e}")
 
+    def flush(self):
+        with self._buffer_lock:
+            if not self._buffer:
+                return
+            actions = list(self._buffer)
+            self._buffer.clear()
+            self._last_flush = time.monotonic()
+        try:
+            helpers.bulk(self.es, actions, index=self.index, chunk_size=500, request_timeout=30)
+        except Exception as e:
+            print(f"Failed to send log to Elasticsearch: {e}")
+
+    def close(self):
+        self.flush()
+        super().close()
+
+_ts_local = threading.local()
+
+def _fast_timestamp():
+    """秒级前缀缓存在线程本地, 每秒只strftime一次, 热路径只拼微秒部分"""
+    t = time.time()
+    sec = int(t)
+    local = _ts_local
+    if getattr(local, 'sec', None) != sec:
+        local.sec = sec
+        local.prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(sec))
+    return f"{local.prefix}.{int((t - sec) * 1e6):06d}Z"
+
+# LogRecord自带的属性集合, 在导入时算一次; emit时用集合差集挑出真正的extra字段
+_STANDARD_LOGRECORD_ATTRS = frozenset(
+    logging.LogRecord('', 0, '', 0, '', None, None).__dict__
+) | {'message', 'asctime'}
+
 class ElasticsearchFormatter(logging.Formatter):
+    __slots__ = ()
+
     def format(self, record):
         try:
             log_entry = {
-                "@timestamp": datetime.now().isoformat(),
+                # 不走datetime对象分配, 秒级前缀有缓存
+                "@timestamp": _fast_timestamp(),
                 "level": record.levelname,
-                "message": self.serialize_message(record.getMessage()),  # 存入 message
+                "message": record.getMessage(),
                 "name": record.name,
                 "pathname": record.pathname,
                 "lineno": record.lineno,
@@ -67,37 +161,47 @@ class ElasticsearchFormatter(logging.Formatter):
                 "exception": self.get_traceback(record),  # 存入 exception
                 "extra": self.serialize_extra(record.__dict__),  # 其他数据
             }
-            return json.dumps(log_entry)
+            # orjson走C实现, 不能序列化的对象统一转字符串
+            return orjson.dumps(log_entry, default=str).decode()
         except Exception as e:
-            return json.dumps({"error": f"Failed to format log: {str(e)}"})
-
-    def serialize_message(self, message):
-        """确保 message 可序列化"""
-        if isinstance(message, (dict, list, str, int, float, bool, type(None))):
-            return message
-        return str(message)  # 不能序列化的对象转换为字符串
+            return orjson.dumps({"error": f"Failed to format log: {str(e)}"}).decode()
 
     def serialize_extra(self, extra_dict):
-        """确保额外的日志数据可序列化"""
-        serializable_data = {}
-        ignore_keys = {"args", "exc_info", "exc_text", "message"}  # 这些字段可能导致问题
-        for key, value in extra_dict.items():
-            if key not in ignore_keys:
-                if isinstance(value, (dict, list, str, int, float, bool, type(None))):
-                    serializable_data[key] = value
-                else:
-                    serializable_data[key] = str(value)  # 不能序列化的对象转换为字符串
-        return serializable_data
+        """提取额外的日志数据, 序列化交给orjson的default=str兜底"""
+        extra_keys = extra_dict.keys() - _STANDARD_LOGRECORD_ATTRS
+        if not extra_keys:
+            # 没有extra是常态, 直接省掉dict构造
+            return {}
+        return {key: extra_dict[key] for key in extra_keys}
 
     def get_traceback(self, record):
         """获取异常堆栈信息"""
         if record.exc_info:
             return "".join(traceback.format_exception(*record.exc_info))
-        return None  # 没有异常时返回 None
+        # 经过队列的记录异常栈已固化在exc_text里
+        return record.exc_text or None
+
+# 控制台输出套64KB缓冲, 突发日志时把每条一次write的系统调用合并掉
+_console_stream = open(sys.stdout.fileno(), mode='w', buffering=65536, closefd=False)
+atexit.register(_console_stream.flush)
+
+def _flush_console_loop():
+    # 后台定期刷新, 保证缓冲里的日志最多滞后200ms
+    while True:
+        time.sleep(0.2)
+        try:
+            _console_stream.flush()
+        except ValueError:
+            break
+
+threading.Thread(target=_flush_console_loop, daemon=True).start()
+
+def _console_handler():
+    return logging.StreamHandler(_console_stream)
 
 LOGGING_CONFIG = {
     'version': 1,
-    'disable_existing_loggers': True, # 覆盖原日志处理
+    'disable_existing_loggers': False, # 不回头禁用已创建的logger
     'formatters': {
         'standard': {
             'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -106,10 +210,9 @@ LOGGING_CONFIG = {
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            '()': _console_handler,
             'level': 'DEBUG',
-            'formatter': 'standard',
-            'stream': 'ext://sys.stdout'
+            'formatter': 'standard'
         }
     },
     'root': {
@@ -125,35 +228,195 @@ LOGGING_CONFIG = {
     }
 }
 
-_loggers = {}
+class _BatchQueueListener(logging.handlers.QueueListener):
+    """攒一批日志再处理的监听器
+
+    默认QueueListener一条一醒, 这里等到一批(队列容量的30%)或1秒超时
+    再统一处理并flush, 监听线程唤醒次数大幅减少, ES侧也能合成更大的bulk批次
+
+    workers>1时起多个消费线程, 各自独立发bulk, 吞吐随ES索引线程数接近线性提升
+    (可用环境变量 ES_INGEST_CONCURRENCY 调整)
+    """
+
+    batch_ratio = 0.3
+    batch_timeout = 1.0
 
-def get_logger(name):
+    def __init__(self, queue, *handlers, respect_handler_level=False, workers=None):
+        super().__init__(queue, *handlers, respect_handler_level=respect_handler_level)
+        if workers is None:
+            workers = int(os.environ.get('ES_INGEST_CONCURRENCY', 0)) or min(12, (os.cpu_count() or 1) * 3)
+        self.workers = workers
+        self._threads = []
+
+    def start(self):
+        for _ in range(self.workers):
+            t = threading.Thread(target=self._monitor, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        # 每个worker各消费一个哨兵后退出
+        for _ in self._threads:
+            self.enqueue_sentinel()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def _monitor(self):
+        q = self.queue
+        has_task_done = hasattr(q, 'task_done')
+        capacity = q.maxsize if getattr(q, 'maxsize', 0) > 0 else 1000
+        batch_max = max(1, int(capacity * self.batch_ratio))
+        stopped = False
+        while not stopped:
+            # 阻塞等第一条, 之后在期限内能攒多少攒多少
+            record = self.dequeue(True)
+            if has_task_done:
+                q.task_done()
+            if record is self._sentinel:
+                break
+            batch = [record]
+            deadline = time.monotonic() + self.batch_timeout
+            while len(batch) < batch_max:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = q.get(True, timeout)
+                except queue.Empty:
+                    break
+                if has_task_done:
+                    q.task_done()
+                if record is self._sentinel:
+                    stopped = True
+                    break
+                batch.append(record)
+            for record in batch:
+                self.handle(record)
+            # 整批处理完统一flush, 缓冲型handler一次性出网
+            for handler in self.handlers:
+                try:
+                    handler.flush()
+                except Exception:
+                    pass
+
+# 未处理的异常统一处理, 导入时挂一次钩子, 不随get_logger的调用者变化
+_unhandled_logger = logging.getLogger('unhandled')
+
+def _handle_exception(exc_type, exc_value, exc_traceback):
+    _unhandled_logger.error("未处理的异常", exc_info=(exc_type, exc_value, exc_traceback))
+
+sys.excepthook = _handle_exception
+
+class _DropOldestQueueHandler(logging.handlers.QueueHandler):
+    """有界队列+丢最旧策略
+
+    ES/企业微信长时间不可用时队列不会无限膨胀; 满了丢最旧一条, 保最新的,
+    丢弃量累积在dropped计数里, 每秒最多向stderr报告一次
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._last_report = 0.0
+
+    def prepare(self, record):
+        """入队前给记录瘦身
+
+        原始LogRecord拖着args/exc_info等重对象, 排队期间一直占着内存还可能
+        拖住引用; 这里把消息和异常栈固化成字符串, 只保留下游formatter用到的
+        字段, 单条排队内存降一个量级
+        """
+        msg = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = "".join(traceback.format_exception(*record.exc_info))
+        slim = logging.makeLogRecord({
+            'name': record.name,
+            'levelno': record.levelno,
+            'levelname': record.levelname,
+            'pathname': record.pathname,
+            'filename': record.filename,
+            'module': record.module,
+            'lineno': record.lineno,
+            'funcName': record.funcName,
+            'created': record.created,
+            'msecs': record.msecs,
+            'msg': msg,
+            'exc_text': exc_text,
+        })
+        # 调用方通过extra塞进来的字段原样带上
+        for key in record.__dict__.keys() - _STANDARD_LOGRECORD_ATTRS:
+            setattr(slim, key, record.__dict__[key])
+        return slim
+
+    def enqueue(self, record):
+        q = self.queue
+        try:
+            q.put_nowait(record)
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(record)
+            except queue.Full:
+                pass
+            self.dropped += 1
+            now = time.monotonic()
+            if now - self._last_report >= 1.0:
+                self._last_report = now
+                print(f"log queue full, {self.dropped} records dropped so far", file=sys.stderr)
+
+_loggers = weakref.WeakValueDictionary()
+_listeners = {}
+_configured = False
+_config_lock = threading.Lock()
+
+def _init_once():
+    # 全局一次性副作用集中在这里, nogil/自由线程下也不会跑两遍
+    global _configured
+    if not _configured:
+        with _config_lock:
+            if not _configured:
+                logging.config.dictConfig(LOGGING_CONFIG)
+                _configured = True
+
+def get_logger(name, handlers=None):
     """生成logger
 
     Args:
         name (str): 程序名
+        handlers (list, optional): 重型handler(ES/企业微信等), 走后台队列异步发送
 
     Returns:
         logger: _description_
     """
-    if name in _loggers:
-        return _loggers[name]
-    
-    logging.config.dictConfig(LOGGING_CONFIG)
+    logger = _loggers.get(name)
+    if logger is not None:
+        return logger
+
+    # dictConfig只应用一次; 每个新name都重建日志子系统既慢又会重复摘掉旧handler
+    _init_once()
     logger = logging.getLogger(name)
-    #logger.addHandler(WxHandler(logging.ERROR))
     #es_handler = ElasticsearchHandler(settings.es.url.split(','), username=settings.es.user, #password=settings.es.password, ca_certs=settings.es.ca_cert)
     #es_handler.setLevel('ERROR')
     #es_handler.setFormatter(ElasticsearchFormatter())
-    #logger.addHandler(es_handler)
-
-    # 未处理的异常统一处理
-    # 定义一个新的异常处理函数
-    def handle_exception(exc_type, exc_value, exc_traceback):
-        logger.error("未处理的异常", exc_info=(exc_type, exc_value, exc_traceback))
+    #logger = get_logger(name, handlers=[es_handler, WxHandler(logging.ERROR)])
 
-    # 将新的异常处理函数设置为 sys.excepthook
-    sys.excepthook = handle_exception
-    _loggers[name] = logger
+    # 网络类handler放到后台线程, 业务线程只付出一次queue.put的成本
+    # 加锁防止并发下同名logger被挂两份QueueHandler(日志翻倍)
+    if handlers:
+        with _config_lock:
+            if name not in _listeners:
+                q = queue.Queue(maxsize=100_000)
+                logger.addHandler(_DropOldestQueueHandler(q))
+                listener = _BatchQueueListener(q, *handlers, respect_handler_level=True)
+                listener.start()
+                # 退出时停掉监听线程, 把队列里未发送的日志刷完
+                atexit.register(listener.stop)
+                _listeners[name] = listener
 
-    return logger
+    # setdefault原子写入, 并发注册同名时保留先到者
+    return _loggers.setdefault(name, logger)
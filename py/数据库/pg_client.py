@@ -1,4 +1,6 @@
 import pymysql
+from contextlib import contextmanager
+from dbutils.pooled_db import PooledDB
 from psycopg_pool import ConnectionPool
 import threading
 from threading import Lock
@@ -16,9 +18,14 @@ class ThreadSafeDBConnectionPool:
                 cls._pools[identifier] = instance
         return cls._pools[identifier]
 
-    def _setup_connection(self, host, user, password, db, port=3306, charset='utf8mb4'):
-        # 用于初始化连接
-        self._connection = pymysql.connect(
+    def _setup_connection(self, host, user, password, db, port=3306, charset='utf8mb4', max_connections=10):
+        # 初始化连接池; pymysql单连接不是线程安全的, 并发要用真正的池
+        self._pool = PooledDB(
+            creator=pymysql,
+            mincached=2,
+            maxcached=10,
+            maxconnections=max_connections,
+            blocking=True,
             host=host,
             user=user,
             password=password,
@@ -28,13 +35,13 @@ class ThreadSafeDBConnectionPool:
         )
 
     def get_connection(self):
-        # 获取当前连接
-        return self._connection
+        # 从池里取连接, close()后自动归还
+        return self._pool.connection()
 
     def close(self):
-        # 关闭单个连接
-        if self._connection:
-            self._connection.close()
+        # 关闭连接池
+        if self._pool:
+            self._pool.close()
 
     @classmethod
     def close_all(cls):
@@ -48,25 +55,42 @@ class PostgresConnectionPool:
     _instance = None
     _lock = threading.Lock()
 
-    def __new__(cls, dsn, min_size=1, max_size=10, **kwargs):
+    def __new__(cls, dsn, min_size=1, max_size=10, pre_warm=True, **kwargs):
         with cls._lock:
             if cls._instance is None:
                 cls._instance = super().__new__(cls)
-                cls._instance._init_pool(dsn, min_size, max_size, **kwargs)
+                cls._instance._init_pool(dsn, min_size, max_size, pre_warm, **kwargs)
         return cls._instance
 
-    def _init_pool(self, dsn, min_size, max_size, **kwargs):
+    def _init_pool(self, dsn, min_size, max_size, pre_warm, **kwargs):
         self.pool = ConnectionPool(
             conninfo=dsn,
             min_size=min_size,
             max_size=max_size,
             **kwargs
         )
+        if pre_warm:
+            # 预热: 等min_size个连接建好, 首个请求不付TCP/TLS/认证握手成本
+            self.pool.wait(timeout=5.0)
         print("✅ psycopg3 连接池初始化成功")
 
     def get_conn(self):
         return self.pool.getconn()
 
+    @contextmanager
+    def get_pipelined_conn(self):
+        """取一个开了管道模式的连接
+
+        写密集场景把一批语句放进 with 块里, 多条语句合并成一次网络往返:
+
+            with db.get_pipelined_conn() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(...)
+        """
+        with self.pool.connection() as conn:
+            with conn.pipeline():
+                yield conn
+
     def put_conn(self, conn):
         self.pool.putconn(conn)
 
@@ -7,28 +7,48 @@ class RedisPoolFactory:
     连接池工厂
     """
     _instances = {}
+    _clients = {}
     _lock = threading.Lock()
 
     @classmethod
-    def get_instance(cls, url):
-        if url not in cls._instances:
+    def get_instance(cls, url, pre_warm=True):
+        # 快路径: dict读在CPython下无须加锁, 池已存在时不碰锁
+        pool = cls._instances.get(url)
+        if pool is None:
             with cls._lock:
-                if url not in cls._instances:
+                pool = cls._instances.get(url)
+                if pool is None:
                     try:
-                        cls._instances[url] = redis.ConnectionPool.from_url(url, decode_responses=True)
+                        pool = redis.ConnectionPool.from_url(url, decode_responses=True)
                     except Exception as e:
                         raise RuntimeError(f"Failed to create Redis connection pool: {e}")
-        return cls._instances[url]
+                    if pre_warm:
+                        # 预热: 先建好连接, 首个请求不用等TCP/AUTH握手
+                        try:
+                            redis.Redis(connection_pool=pool).ping()
+                        except Exception:
+                            pass
+                    cls._instances[url] = pool
+        return pool
 
     @classmethod
     def get_redis_conn(cls, url):
-        pool = cls.get_instance(url)
-        return redis.Redis(connection_pool=pool, decode_responses=True)
+        # Redis客户端本身线程安全, 按url缓存后热路径只剩一次dict.get
+        client = cls._clients.get(url)
+        if client is None:
+            pool = cls.get_instance(url)
+            with cls._lock:
+                client = cls._clients.get(url)
+                if client is None:
+                    client = redis.Redis(connection_pool=pool, decode_responses=True)
+                    cls._clients[url] = client
+        return client
 
     @classmethod
     def destroy_instance(cls, url):
         """销毁指定 URL 对应的连接池"""
         with cls._lock:
+            cls._clients.pop(url, None)
             if url in cls._instances:
                 pool = cls._instances.pop(url)
                 # 主动断开连接池里的所有连接
@@ -38,6 +58,7 @@ class RedisPoolFactory:
     def destroy_all(cls):
         """销毁所有连接池"""
         with cls._lock:
+            cls._clients.clear()
             for pool in cls._instances.values():
                 pool.disconnect()
             cls._instances.clear()
\ No newline at end of file
@@ -1,18 +1,62 @@
 # 复杂表达式匹配，50个词以下性能好
+import logging
 import re
-from collections import Counter
+import ahocorasick
+from collections import Counter, defaultdict
 from functools import lru_cache
-import ply.lex as lex
-import ply.yacc as yacc
+import itertools
 import threading
 
-# 全局缓存解析器
-_parser_cache = None
-_lexer_cache = None
+# 可选的Hyperscan后端: SIMD+DFA, 大词表(>50词)下明显快于re的交替分支;
+# 未安装时静默回退到已有的compiled-re路径, 对外行为不变
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
-# 缓存版本控制
+# 库代码默认不输出: NullHandler兜底, 级别关掉时logging直接短路不拼字符串
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+# 缓存版本控制: next()在GIL下原子, 失效路径不再需要锁
+_version_counter = itertools.count(1)
 _cache_version = 0
-_cache_lock = threading.Lock()
+
+# 模块级预编译, 不依赖re内部有限的缓存
+_RE_WS = re.compile(r'\s+')
+
+
+def _extract_keywords(expr, _ops=frozenset('()+|')):
+    """单遍手工扫描提取表达式里的全部字面词
+
+    短表达式上re.findall的引擎调度+每词Match对象分配比这趟纯Python循环还贵;
+    表达式此时已去除空白
+    """
+    keywords = set()
+    start = -1
+    for i, ch in enumerate(expr):
+        if ch in _ops:
+            if start >= 0:
+                keywords.add(expr[start:i])
+                start = -1
+        elif start < 0:
+            start = i
+    if start >= 0:
+        keywords.add(expr[start:])
+    return keywords
+
+# 顶层结果缓存用普通dict: 整体失效靠版本号, 不需要LRU逐条淘汰,
+# 省掉lru_cache每次命中的C级锁+链表轮转, dict.get命中约便宜一半
+_CACHE_MAX = 2048
+_simple_cache = {}
+_regex_cache = {}
+_present_cache = {}
+_expr_cache = {}
+_cache_hits = 0
+_cache_misses = 0
+
+# 区分"没缓存"和"缓存了空结果"({}/()都是falsy)
+_MISS = object()
 
 
 def invalidate_cache():
@@ -20,12 +64,16 @@ def invalidate_cache():
     当关键词组变化时调用此函数清空所有缓存
     """
     global _cache_version
-    with _cache_lock:
-        _cache_version += 1
-        _find_keywords_simple_cached.cache_clear()
-        _find_keywords_regex_cached.cache_clear()
-        _complex_expression_cached.cache_clear()
-        print(f"✓ Cache cleared, new version: {_cache_version}")
+    # 先换版本号再清缓存: 并发读者最多用新版本号miss一次, 不会读到旧结果
+    _cache_version = next(_version_counter)
+    _simple_cache.clear()
+    _regex_cache.clear()
+    _present_cache.clear()
+    _expr_cache.clear()
+    _build_ac.cache_clear()
+    _compile_alt.cache_clear()
+    _hs_db_for.cache_clear()
+    _log.info("✓ Cache cleared, new version: %s", _cache_version)
 
 
 def get_cache_info():
@@ -34,247 +82,407 @@ def get_cache_info():
     """
     return {
         'version': _cache_version,
-        'simple_cache': _find_keywords_simple_cached.cache_info(),
-        'regex_cache': _find_keywords_regex_cached.cache_info(),
-        'expression_cache': _complex_expression_cached.cache_info()
+        'hits': _cache_hits,
+        'misses': _cache_misses,
+        'simple_cache': len(_simple_cache),
+        'regex_cache': len(_regex_cache),
+        'expression_cache': len(_expr_cache)
     }
 
 
-def _get_parser():
-    """获取缓存的解析器"""
-    global _parser_cache, _lexer_cache
-
-    if _parser_cache is not None and _lexer_cache is not None:
-        return _parser_cache, _lexer_cache
-
-    tokens = ('LPAREN', 'RPAREN', 'OR', 'AND', 'WORD')
+# ============ 内部缓存函数（带版本号） ============
 
-    t_LPAREN = r'\('
-    t_RPAREN = r'\)'
-    t_OR = r'\|'
-    t_AND = r'\+'
-    t_WORD = r'[^\(\)\+\|\s]+'
-    t_ignore = ' \t\n'
+@lru_cache(maxsize=256)
+def _norm_keywords(kw_frozenset):
+    """关键词组归一化: frozenset -> 排序小写元组, 按词组整体记忆
 
-    def t_error(t):
-        print("Illegal character '%s'" % t.value[0])
-        t.lexer.skip(1)
+    同一词组反复配不同文本时, K次str.lower()和排序只付一次;
+    下游缓存函数拿到的就是已小写的元组, 不再逐词lower
+    """
+    return tuple(sorted(k.lower() for k in kw_frozenset))
 
-    lexer = lex.lex()
 
-    # ============ 修复后的语法规则 ============
+@lru_cache(maxsize=512)
+def _build_ac(keywords_tuple, cache_ver):
+    """构建Aho-Corasick自动机, 按(关键词组, 缓存版本)缓存
 
-    def p_expression_and(p):
-        '''expression : expression AND term'''
-        # AND操作：创建嵌套结构表示"必须同时满足"
-        if isinstance(p[1], list) and len(p[1]) > 0 and isinstance(p[1][0], list):
-            # 已经是AND结构，继续追加
-            p[0] = p[1] + [p[3]]
-        else:
-            # 创建新的AND结构
-            p[0] = [p[1], p[3]]
-
-    def p_expression_term(p):
-        '''expression : term'''
-        p[0] = p[1]
-
-    def p_term_or(p):
-        '''term : term OR factor'''
-        # OR操作：平铺列表
-        if isinstance(p[1], list) and not any(isinstance(x, list) for x in p[1]):
-            # 已经是OR列表，继续追加
-            p[0] = p[1] + [p[3]] if isinstance(p[3], str) else p[1] + p[3]
-        else:
-            # 创建新的OR列表
-            p[0] = [p[1], p[3]] if isinstance(p[3], str) else [p[1]] + p[3]
+    keywords_tuple经_norm_keywords归一化, 已全小写
+    """
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords_tuple:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
 
-    def p_term_factor(p):
-        '''term : factor'''
-        p[0] = p[1]
 
-    def p_factor_group(p):
-        '''factor : LPAREN expression RPAREN'''
-        # 括号内的表达式直接返回，保持结构
-        p[0] = p[2]
+def _find_keywords_simple_cached(text_lower, keywords_tuple, cache_ver):
+    """内部缓存函数 - 简单关键词查找
 
-    def p_factor_word(p):
-        '''factor : WORD'''
-        p[0] = p[1]
+    自动机一次线性扫描拿到所有词的出现次数, 代替逐词str.count的K遍扫描
+    """
+    # 空词组直接返回: 空自动机make_automaton后iter会报错
+    if not keywords_tuple:
+        return {}
 
-    def p_error(p):
-        if p:
-            raise SyntaxError(f"Syntax error at '{p.value}'")
-        else:
-            raise SyntaxError("Syntax error at EOF")
+    global _cache_hits, _cache_misses
+    key = (text_lower, keywords_tuple, cache_ver)
+    result = _simple_cache.get(key, _MISS)
+    if result is not _MISS:
+        _cache_hits += 1
+        return result
+    _cache_misses += 1
 
-    parser = yacc.yacc(debug=False, write_tables=False)
+    counts = Counter()
+    for _, keyword in _build_ac(keywords_tuple, cache_ver).iter(text_lower):
+        counts[keyword] += 1
+    result = dict(counts)
 
-    _parser_cache = parser
-    _lexer_cache = lexer
+    if len(_simple_cache) >= _CACHE_MAX:
+        _simple_cache.clear()
+    _simple_cache[key] = result
+    return result
 
-    return parser, lexer
 
+@lru_cache(maxsize=256)
+def _compile_alt(keywords_tuple, cache_ver):
+    """编译关键词的选择分支正则, 按(关键词组, 缓存版本)缓存Pattern对象
 
-# ============ 内部缓存函数（带版本号） ============
+    re的选择分支是最左优先: 若a320排在a320neo前面, 长词永远匹配不到.
+    缓存键keywords_tuple仍按字母序保证哈希稳定, 这里在编译时按长度降序重排
+    """
+    kws = sorted(set(keywords_tuple), key=lambda s: (-len(s), s))
+    return re.compile('|'.join(re.escape(k) for k in kws))
 
-@lru_cache(maxsize=2048)
-def _find_keywords_simple_cached(text_lower, keywords_tuple, cache_ver):
-    """内部缓存函数 - 简单关键词查找"""
-    word_counts = {}
 
-    for keyword in keywords_tuple:
-        keyword_lower = keyword.lower()
-        count = text_lower.count(keyword_lower)
-        if count > 0:
-            word_counts[keyword_lower] = count
+@lru_cache(maxsize=256)
+def _hs_db_for(keywords_tuple, cache_ver):
+    """编译Hyperscan块模式数据库, 按(关键词组, 缓存版本)缓存"""
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[re.escape(k).encode() for k in keywords_tuple],
+        ids=list(range(len(keywords_tuple))),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * len(keywords_tuple),
+    )
+    return db
 
-    return word_counts
 
-
-@lru_cache(maxsize=1024)
 def _find_keywords_regex_cached(text_lower, keywords_tuple, cache_ver):
     """内部缓存函数 - 正则表达式查找"""
     if not keywords_tuple:
         return {}
 
-    escaped_keywords = [re.escape(k.lower()) for k in keywords_tuple]
-    pattern = '|'.join(f'({k})' for k in escaped_keywords)
+    global _cache_hits, _cache_misses
+    key = (text_lower, keywords_tuple, cache_ver)
+    result = _regex_cache.get(key, _MISS)
+    if result is not _MISS:
+        _cache_hits += 1
+        return result
+    _cache_misses += 1
+
+    counts = defaultdict(int)
+    if hyperscan is not None:
+        # hyperscan报告全部匹配(含重叠和被长词覆盖的前缀), 而re的
+        # 选择分支是最左最长不重叠; 收集起止位置后贪心筛一遍,
+        # 两个后端的计数才一致
+        matches = []
+
+        def _on_match(pat_id, start, end, flags, ctx=None):
+            matches.append((start, -end, pat_id))
+
+        _hs_db_for(keywords_tuple, cache_ver).scan(
+            text_lower.encode(), match_event_handler=_on_match)
+
+        # 排序后同一起点最长的排前面; 跳过与已取匹配重叠的
+        matches.sort()
+        last_end = 0
+        for start, neg_end, pat_id in matches:
+            if start >= last_end:
+                counts[keywords_tuple[pat_id]] += 1
+                last_end = -neg_end
+    else:
+        # 编译好的Pattern直接复用; finditer逐个流式累加,
+        # 不走findall那种"先攒整张match列表再展平计数"的O(匹配数)临时分配
+        pattern = _compile_alt(keywords_tuple, cache_ver)
+        for m in pattern.finditer(text_lower):
+            counts[m.group()] += 1
+    result = dict(counts)
 
-    matches = re.findall(pattern, text_lower)
-    flat_matches = [m for group in matches for m in group if m]
+    if len(_regex_cache) >= _CACHE_MAX:
+        _regex_cache.clear()
+    _regex_cache[key] = result
+    return result
 
-    return dict(Counter(flat_matches))
+
+def _find_keywords_present_cached(text_lower, keywords_tuple, cache_ver):
+    """内部缓存函数 - 只判断哪些词出现
+
+    表达式匹配只消费"出现与否", 不用统计次数; 未命中时省掉整个计数pass
+    """
+    global _cache_hits, _cache_misses
+    key = (text_lower, keywords_tuple, cache_ver)
+    result = _present_cache.get(key, _MISS)
+    if result is not _MISS:
+        _cache_hits += 1
+        return result
+    _cache_misses += 1
+
+    if len(keywords_tuple) <= 20:
+        if text_lower.isascii():
+            # ASCII走bytes通道: bytes查找是纯memchr的C循环, 没有Unicode表示判断;
+            # 非ASCII关键词编码后在ASCII字节串里必然找不到, 语义不变
+            text_bytes = text_lower.encode()
+            result = frozenset(k for k in keywords_tuple if k.encode() in text_bytes)
+        else:
+            result = frozenset(k for k in keywords_tuple if k in text_lower)
+    else:
+        pattern = _compile_alt(keywords_tuple, cache_ver)
+        result = frozenset(m.group() for m in pattern.finditer(text_lower))
+
+    if len(_present_cache) >= _CACHE_MAX:
+        _present_cache.clear()
+    _present_cache[key] = result
+    return result
+
+
+def _canonicalize(node):
+    """归一化交换律节点, 返回规范形式字符串
+
+    AND/OR的子项顺序不影响语义, 统一按规范串排序后,
+    airbus+a320 和 a320+airbus 落到同一个缓存槽位
+    """
+    if isinstance(node, str):
+        return node.lower()
+    items = node['items']
+    keys = [_canonicalize(item) for item in items]
+    order = sorted(range(len(items)), key=keys.__getitem__)
+    node['items'] = [items[i] for i in order]
+    return node['op'] + '(' + ','.join(keys[i] for i in order) + ')'
+
+
+def _compile_bitmap(node, bit_index):
+    """把解析树编译成位图布尔表达式源码
+
+    词w出现与否放在位图b的第bit_index[w]位上, AND/OR直接映射成&/|;
+    整条规则收缩成一个整数位运算表达式, 比逐指令的栈求值更省
+    """
+    if isinstance(node, str):
+        return f'b>>{bit_index[node.lower()]}&1'
+    op = '&' if node['op'] == 'AND' else '|'
+    return '(' + op.join(_compile_bitmap(item, bit_index) for item in node['items']) + ')'
+
+
+def _compile_postfix(node, code):
+    """把解析树压平成后缀指令: ('L', 词) / ('A', 操作数个数) / ('O', 操作数个数)"""
+    if isinstance(node, str):
+        code.append(('L', node.lower()))
+        return
+    items = node.get('items', ())
+    for item in items:
+        _compile_postfix(item, code)
+    code.append(('A' if node.get('op') == 'AND' else 'O', len(items)))
 
 
-@lru_cache(maxsize=512)
 def _complex_expression_cached(expression, cache_ver):
-    """内部缓存函数 - 复杂表达式解析"""
-    parser, lexer = _get_parser()
+    """内部缓存函数 - 解析并编译
 
-    try:
-        result = parser.parse(expression, lexer=lexer)
+    返回 (后缀指令元组, 位序词表, 位图求值函数):
+    词数<=64时额外编译一个位图lambda, 求值函数为None时走后缀栈求值
+    """
+    global _cache_hits, _cache_misses
+    key = (expression, cache_ver)
+    result = _expr_cache.get(key, _MISS)
+    if result is not _MISS:
+        _cache_hits += 1
         return result
-    except SyntaxError as e:
-        print(e)
-        return None
+    _cache_misses += 1
+
+    tree = complex_expression(expression)
+    if not tree:
+        result = ((), (), None)
+    else:
+        # 先按规范形式查一次: 语义等价的写法共享同一份编译结果
+        canon_key = (_canonicalize(tree), cache_ver)
+        result = _expr_cache.get(canon_key, _MISS)
+        if result is _MISS:
+            code = []
+            _compile_postfix(tree, code)
+            code = tuple(code)
+            words = tuple(dict.fromkeys(arg for op, arg in code if op == 'L'))
+            if len(words) <= 64:
+                # 编译成int位运算表达式; 源码里只有位号常量, 不含用户输入
+                bit_index = {w: i for i, w in enumerate(words)}
+                bit_fn = eval('lambda b: ' + _compile_bitmap(tree, bit_index),
+                              {'__builtins__': {}})
+            else:
+                bit_fn = None
+            result = (code, words, bit_fn)
+            _expr_cache[canon_key] = result
+
+    if len(_expr_cache) >= _CACHE_MAX:
+        _expr_cache.clear()
+    _expr_cache[key] = result
+    return result
+
+
+def _eval_postfix(code, target_set):
+    """
+    栈式求值后缀程序
+
+    参数:
+    - code: _compile_postfix 产出的指令元组
+    - target_set: 文本中找到的关键词集合（小写）
+
+    返回: True/False
+
+    对比递归遍历dict树: 没有递归帧、没有dict.get/isinstance, 只剩列表操作
+    """
+    if not code:
+        return False
+    stack = []
+    append = stack.append
+    for op, arg in code:
+        if op == 'L':
+            append(arg in target_set)
+        else:
+            result = all(stack[-arg:]) if op == 'A' else any(stack[-arg:])
+            del stack[-arg:]
+            append(result)
+    return stack[0]
 
 
 # ============ 对外接口（与原始代码完全一致） ============
 
-def find_keywords_simple(text, keywords):
+def find_keywords_simple(text, keywords, already_lower=False):
     """
     简单关键词查找 - 自动使用缓存
     与原始代码接口完全一致
+
+    already_lower: 调用方已做过lower()时传True, 大文本省一遍全量拷贝
     """
     global _cache_version
 
-    text_lower = text.lower()
-    keywords_tuple = tuple(sorted(keywords))  # 转为可哈希类型
+    text_lower = text if already_lower else text.lower()
+    keywords_tuple = _norm_keywords(frozenset(keywords))  # 归一化并记忆
 
     # 自动查询缓存，不存在则生成
     return _find_keywords_simple_cached(text_lower, keywords_tuple, _cache_version)
 
 
-def find_keywords_regex(text, keywords):
+def find_keywords_regex(text, keywords, already_lower=False):
     """
     正则表达式查找 - 自动使用缓存
     与原始代码接口完全一致
+
+    already_lower: 调用方已做过lower()时传True, 大文本省一遍全量拷贝
     """
     global _cache_version
 
     if not keywords:
         return {}
 
-    text_lower = text.lower()
-    keywords_tuple = tuple(sorted(keywords))
+    text_lower = text if already_lower else text.lower()
+    keywords_tuple = _norm_keywords(frozenset(keywords))
 
     # 自动查询缓存，不存在则生成
     return _find_keywords_regex_cached(text_lower, keywords_tuple, _cache_version)
 
 
+# 解析器实例按线程缓存(解析过程有内部状态, 不能跨线程共享)
+_TLS = threading.local()
+
+
+class _ExprParser:
+    """递归下降表达式解析器, 每线程复用一个实例"""
+
+    def __init__(self, expr):
+        self.reset(expr)
+
+    def reset(self, expr):
+        """重置到新表达式, 实例可复用"""
+        # 末尾补'\0'哨兵: peek/consume不用做边界判断, EOF处读到的就是哨兵
+        self.expr = expr.replace(' ', '') + '\0'
+        self.pos = 0
+
+    def peek(self):
+        """查看当前字符, EOF处返回'\\0'哨兵"""
+        return self.expr[self.pos]
+
+    def consume(self):
+        """消费当前字符(调用方已经peek过, 不会在EOF处调用)"""
+        char = self.expr[self.pos]
+        self.pos += 1
+        return char
+
+    def parse_keyword(self, _stop=frozenset('()|+\0')):
+        """解析关键词"""
+        # 局部变量绑定, 热循环里省掉反复的属性查找; 停止符集合预存为默认参数
+        e = self.expr
+        start = pos = self.pos
+        while e[pos] not in _stop:
+            pos += 1
+        self.pos = pos
+        return e[start:pos]
+
+    def parse_term(self):
+        """解析term: '(' expression ')' | keyword"""
+        if self.peek() == '(':
+            self.consume()  # 消费 '('
+            result = self.parse_or_expr()
+            if self.peek() == ')':
+                self.consume()  # 消费 ')'
+            return result
+        else:
+            return self.parse_keyword()
+
+    def parse_and_expr(self):
+        """解析AND表达式: term ('+' term)*"""
+        items = [self.parse_term()]
+
+        while self.peek() == '+':
+            self.consume()  # 消费 '+'
+            items.append(self.parse_term())
+
+        if len(items) == 1:
+            return items[0]
+        return {'op': 'AND', 'items': items}
+
+    def parse_or_expr(self):
+        """解析OR表达式: and_expr ('|' and_expr)*"""
+        items = [self.parse_and_expr()]
+
+        while self.peek() == '|':
+            self.consume()  # 消费 '|'
+            items.append(self.parse_and_expr())
+
+        if len(items) == 1:
+            return items[0]
+        return {'op': 'OR', 'items': items}
+
+    def parse(self):
+        """入口函数"""
+        return self.parse_or_expr()
+
+
 def complex_expression(expr):
     """
     重写的表达式解析器 - 使用递归下降解析
-    
+
     语法规则:
     expression := or_expr
     or_expr    := and_expr ('|' and_expr)*
     and_expr   := term ('+' term)*
     term       := '(' expression ')' | keyword
-    
+
     返回结构:
     - 字符串: 单个关键词
     - {'op': 'OR', 'items': [...]}:  OR表达式
     - {'op': 'AND', 'items': [...]}: AND表达式
     """
-    
-    class Parser:
-        def __init__(self, expr):
-            self.expr = expr.replace(' ', '')
-            self.pos = 0
-            self.length = len(self.expr)
-        
-        def peek(self):
-            """查看当前字符"""
-            if self.pos < self.length:
-                return self.expr[self.pos]
-            return None
-        
-        def consume(self):
-            """消费当前字符"""
-            if self.pos < self.length:
-                char = self.expr[self.pos]
-                self.pos += 1
-                return char
-            return None
-        
-        def parse_keyword(self):
-            """解析关键词"""
-            start = self.pos
-            while self.pos < self.length and self.expr[self.pos] not in '()|+':
-                self.pos += 1
-            return self.expr[start:self.pos]
-        
-        def parse_term(self):
-            """解析term: '(' expression ')' | keyword"""
-            if self.peek() == '(':
-                self.consume()  # 消费 '('
-                result = self.parse_or_expr()
-                if self.peek() == ')':
-                    self.consume()  # 消费 ')'
-                return result
-            else:
-                return self.parse_keyword()
-        
-        def parse_and_expr(self):
-            """解析AND表达式: term ('+' term)*"""
-            items = [self.parse_term()]
-            
-            while self.peek() == '+':
-                self.consume()  # 消费 '+'
-                items.append(self.parse_term())
-            
-            if len(items) == 1:
-                return items[0]
-            return {'op': 'AND', 'items': items}
-        
-        def parse_or_expr(self):
-            """解析OR表达式: and_expr ('|' and_expr)*"""
-            items = [self.parse_and_expr()]
-            
-            while self.peek() == '|':
-                self.consume()  # 消费 '|'
-                items.append(self.parse_and_expr())
-            
-            if len(items) == 1:
-                return items[0]
-            return {'op': 'OR', 'items': items}
-        
-        def parse(self):
-            """入口函数"""
-            return self.parse_or_expr()
-    
-    parser = Parser(expr)
+    # 每线程复用一个解析器实例: 解析密集时省掉反复分配+回收的开销
+    parser = getattr(_TLS, 'parser', None)
+    if parser is None:
+        parser = _TLS.parser = _ExprParser.__new__(_ExprParser)
+    parser.reset(expr)
     return parser.parse()
 
 
@@ -283,451 +491,57 @@ def expr_match(expr, value):
     表达式匹配 - 使用新的解析器
     """
     # 清理表达式
-    expr = re.sub(r'\s+', '', expr)
-    keywords = set(re.findall(r'[^\(\)\+\|]+', expr))
+    expr = _RE_WS.sub('', expr)
+    keywords = _extract_keywords(expr)
 
     if not keywords:
         return False
 
     value_lower = value.lower()
+    keywords_tuple = _norm_keywords(frozenset(keywords))
+
+    # 命中后才按需统计次数返回给调用方
+    def target_counts():
+        return _find_keywords_simple_cached(value_lower, keywords_tuple, _cache_version)
+
+    if '(' not in expr:
+        # 快速路径1：简单AND表达式（a+b+c）
+        # 逐词短路: 第一个缺词立即False, 失败(常见情况)不用扫完全部关键词
+        if '+' in expr and '|' not in expr:
+            if all(k in value_lower for k in keywords_tuple):
+                return target_counts()
+            return False
 
-    # 查找关键词
-    if len(keywords) <= 20:
-        target_list = find_keywords_simple(value_lower, keywords)
-    else:
-        target_list = find_keywords_regex(value_lower, keywords)
-
-    if not target_list:
-        return False
-
-    target_set = set(target_list.keys())
+        # 快速路径2：简单OR表达式（a|b|c）- 第一个命中词立即成功
+        if '|' in expr and '+' not in expr:
+            if any(k in value_lower for k in keywords_tuple):
+                return target_counts()
+            return False
 
-    # 快速路径1：简单AND表达式（a+b+c）
-    if '+' in expr and '|' not in expr and '(' not in expr:
-        keywords_lower = {k.lower() for k in keywords}
-        if keywords_lower.issubset(target_set):
-            return target_list
-        return False
+    # 复杂表达式才需要完整的"哪些词出现"集合
+    target_set = _find_keywords_present_cached(value_lower, keywords_tuple, _cache_version)
 
-    # 快速路径2：简单OR表达式（a|b|c）
-    if '|' in expr and '+' not in expr and '(' not in expr:
-        keywords_lower = {k.lower() for k in keywords}
-        if keywords_lower.intersection(target_set):
-            return target_list
+    if not target_set:
         return False
 
-    # 复杂表达式
     try:
-        parsed_result = complex_expression(expr)
-        if _check_match(parsed_result, target_set):
-            return target_list
+        code, bit_words, bit_fn = _complex_expression_cached(expr, _cache_version)
+        if bit_fn is not None:
+            # 位图通道: 每个出现的词置一位, 整条规则一次位运算出结果
+            b = 0
+            for i, w in enumerate(bit_words):
+                if w in target_set:
+                    b |= 1 << i
+            matched = bit_fn(b)
+        else:
+            matched = _eval_postfix(code, target_set)
+        if matched:
+            return target_counts()
     except Exception as e:
-        # 解析失败，回退到旧逻辑
-        print(f"解析失败: {expr}, 错误: {e}")
+        # 解析失败; 热路径上用惰性%格式化, stdout写盘的开销交给logging处理
+        _log.warning("解析失败: %s, 错误: %s", expr, e)
         return False
 
     return False
 
 
-def _check_match(parsed_result, target_set):
-    """
-    递归检查解析结果是否匹配
-    
-    参数:
-    - parsed_result: 解析结果（字符串或字典）
-    - target_set: 文本中找到的关键词集合（小写）
-    
-    返回: True/False
-    """
-    if not parsed_result:
-        return False
-    
-    # 情况1: 字符串 - 单个关键词
-    if isinstance(parsed_result, str):
-        return parsed_result.lower() in target_set
-    
-    # 情况2: 字典 - 复合表达式
-    if isinstance(parsed_result, dict):
-        op = parsed_result.get('op')
-        items = parsed_result.get('items', [])
-        
-        if not items:
-            return False
-        
-        if op == 'OR':
-            # OR: 任一子项满足即可
-            return any(_check_match(item, target_set) for item in items)
-        
-        elif op == 'AND':
-            # AND: 所有子项必须满足
-            return all(_check_match(item, target_set) for item in items)
-    
-    return False
-
-
-# ============ 使用示例 ============
-
-if __name__ == "__main__":
-
-    print("\n" * 2)
-    print("=" * 80)
-    print("简单规则测试")
-    print("=" * 80)
-
-    # 测试1: 单个关键词
-    print("\n【测试1】单个关键词匹配")
-    print("规则: airbus")
-    test_cases_1 = [
-        ("Airbus announces new aircraft", True, "匹配：airbus"),
-        ("Boeing 737 update", False, "不匹配：无airbus"),
-        ("AIRBUS A320 safety", True, "匹配：大写AIRBUS"),
-        ("The airbus fleet", True, "匹配：小写airbus"),
-    ]
-    for text, expected, desc in test_cases_1:
-        result = expr_match("airbus", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试2: 两个关键词OR
-    print("\n【测试2】两个关键词OR")
-    print("规则: airbus|boeing")
-    test_cases_2 = [
-        ("Airbus A320 report", True, "匹配：airbus"),
-        ("Boeing 737 update", True, "匹配：boeing"),
-        ("Airbus and Boeing comparison", True, "匹配：airbus和boeing都有"),
-        ("Embraer aircraft news", False, "不匹配：无airbus或boeing"),
-    ]
-    for text, expected, desc in test_cases_2:
-        result = expr_match("airbus|boeing", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试3: 两个关键词AND
-    print("\n【测试3】两个关键词AND")
-    print("规则: airbus+a320")
-    test_cases_3 = [
-        ("Airbus A320 safety report", True, "匹配：airbus和a320都有"),
-        ("Airbus A350 update", False, "不匹配：有airbus但无a320"),
-        ("A320 aircraft details", False, "不匹配：有a320但无airbus"),
-        ("Boeing 737 news", False, "不匹配：两个都没有"),
-    ]
-    for text, expected, desc in test_cases_3:
-        result = expr_match("airbus+a320", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试4: 三个关键词OR
-    print("\n【测试4】三个关键词OR")
-    print("规则: airbus|boeing|embraer")
-    test_cases_4 = [
-        ("Airbus news", True, "匹配：airbus"),
-        ("Boeing update", True, "匹配：boeing"),
-        ("Embraer aircraft", True, "匹配：embraer"),
-        ("Bombardier jet", False, "不匹配：无任何关键词"),
-    ]
-    for text, expected, desc in test_cases_4:
-        result = expr_match("airbus|boeing|embraer", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试5: 三个关键词AND
-    print("\n【测试5】三个关键词AND")
-    print("规则: airbus+a320+safety")
-    test_cases_5 = [
-        ("Airbus A320 safety report released", True, "匹配：全部三个关键词"),
-        ("Airbus A320 maintenance", False, "不匹配：缺少safety"),
-        ("Airbus safety protocols", False, "不匹配：缺少a320"),
-        ("A320 safety check", False, "不匹配：缺少airbus"),
-    ]
-    for text, expected, desc in test_cases_5:
-        result = expr_match("airbus+a320+safety", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试6: 简单括号 (A|B)+C
-    print("\n【测试6】简单括号组合")
-    print("规则: (airbus|boeing)+safety")
-    test_cases_6 = [
-        ("Airbus safety report", True, "匹配：airbus+safety"),
-        ("Boeing safety update", True, "匹配：boeing+safety"),
-        ("Airbus news", False, "不匹配：缺少safety"),
-        ("Safety regulations", False, "不匹配：缺少airbus或boeing"),
-    ]
-    for text, expected, desc in test_cases_6:
-        result = expr_match("(airbus|boeing)+safety", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试7: 简单括号 A+(B|C)
-    print("\n【测试7】简单括号组合（反向）")
-    print("规则: airbus+(a320|a350)")
-    test_cases_7 = [
-        ("Airbus A320 details", True, "匹配：airbus+a320"),
-        ("Airbus A350 update", True, "匹配：airbus+a350"),
-        ("Airbus A380 news", False, "不匹配：缺少a320或a350"),
-        ("Boeing A320", False, "不匹配：缺少airbus"),
-    ]
-    for text, expected, desc in test_cases_7:
-        result = expr_match("airbus+(a320|a350)", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试8: 两组OR的AND - (A|B)+(C|D)
-    print("\n【测试8】两组OR的AND组合")
-    print("规则: (airbus|boeing)+(a320|737)")
-    test_cases_8 = [
-        ("Airbus A320 report", True, "匹配：airbus+a320"),
-        ("Boeing 737 update", True, "匹配：boeing+737"),
-        ("Airbus 737 hybrid", True, "匹配：airbus+737"),
-        ("Boeing A320 test", True, "匹配：boeing+a320"),
-        ("Airbus A350 news", False, "不匹配：缺少a320或737"),
-        ("Embraer E190", False, "不匹配：两组都不匹配"),
-    ]
-    for text, expected, desc in test_cases_8:
-        result = expr_match("(airbus|boeing)+(a320|737)", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试9: 空文本和空规则
-    print("\n【测试9】边界情况")
-    print("规则: airbus")
-    test_cases_9 = [
-        ("", False, "空文本"),
-        ("   ", False, "纯空格"),
-        ("No match here", False, "完全不匹配"),
-    ]
-    for text, expected, desc in test_cases_9:
-        result = expr_match("airbus", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: '{text}'")
-        print(f"    结果: {result}")
-
-    # 测试10: 特殊字符处理
-    print("\n【测试10】特殊字符和数字")
-    print("规则: a320|737")
-    test_cases_10 = [
-        ("A320 aircraft", True, "匹配：a320（大写）"),
-        ("Boeing 737-800", True, "匹配：737（带连字符）"),
-        ("Flight A320-200", True, "匹配：a320（带连字符）"),
-        ("Model 747", False, "不匹配：不同型号"),
-    ]
-    for text, expected, desc in test_cases_10:
-        result = expr_match("a320|737", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    print("\n" + "=" * 80)
-    print("简单测试完成！")
-    print("=" * 80)
-
-    # 显示缓存统计
-    print("\n【缓存统计】")
-    cache_info = get_cache_info()
-    print(f"缓存版本: {cache_info['version']}")
-    print(f"简单搜索缓存: {cache_info['simple_cache']}")
-    print(f"正则搜索缓存: {cache_info['regex_cache']}")
-    print(f"表达式解析缓存: {cache_info['expression_cache']}")
-    print("\n" * 3)
-    print("=" * 80)
-    print("复杂规则测试")
-    print("=" * 80)
-
-    # 测试1: 三层嵌套 - (A|B)+(C|D)+(E|F)
-    print("\n【测试1】三层OR+AND组合")
-    print("规则: (airbus|boeing)+(a320|737)+(safety|inspection)")
-    test_cases_1 = [
-        ("Airbus A320 safety report", True, "匹配：airbus+a320+safety"),
-        ("Boeing 737 inspection update", True, "匹配：boeing+737+inspection"),
-        ("Airbus A350 safety report", False, "不匹配：缺少a320/737"),
-        ("Boeing safety protocols", False, "不匹配：缺少a320/737"),
-    ]
-    for text, expected, desc in test_cases_1:
-        result = expr_match(
-            "(airbus|boeing)+(a320|737)+(safety|inspection)", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试2: 四层嵌套 - ((A+B)|(C+D))+(E|F)
-    print("\n【测试2】嵌套AND在OR内部")
-    print("规则: ((airbus+a320)|(boeing+737))+(defect|flaw)")
-    test_cases_2 = [
-        ("Airbus A320 defect found", True, "匹配：(airbus+a320)+defect"),
-        ("Boeing 737 flaw detected", True, "匹配：(boeing+737)+flaw"),
-        ("Airbus defect report", False, "不匹配：缺少a320"),
-        ("Boeing 737 update", False, "不匹配：缺少defect/flaw"),
-    ]
-    for text, expected, desc in test_cases_2:
-        result = expr_match("((airbus+a320)|(boeing+737))+(defect|flaw)", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试3: 五层复杂嵌套 - (A|(B+C))+(D|(E+F))
-    print("\n【测试3】混合OR和AND的对称结构")
-    print("规则: (crash|(accident+investigation))+(pilot|(crew+training))")
-    test_cases_3 = [
-        ("Crash involving pilot error", True, "匹配：crash+pilot"),
-        ("Accident investigation crew training", True,
-         "匹配：(accident+investigation)+(crew+training)"),
-        ("Crash report released", False, "不匹配：缺少pilot/crew/training"),
-        ("Pilot training program", False, "不匹配：缺少crash/accident/investigation"),
-    ]
-    for text, expected, desc in test_cases_3:
-        result = expr_match(
-            "(crash|(accident+investigation))+(pilot|(crew+training))", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试4: 六层超级复杂 - ((A+B)|(C+D))+((E+F)|(G+H))
-    print("\n【测试4】双重嵌套AND+OR组合")
-    print("规则: ((airbus+a320)|(boeing+737))+((engine+failure)|(fuel+leak))")
-    test_cases_4 = [
-        ("Airbus A320 engine failure reported",
-         True, "匹配：(airbus+a320)+(engine+failure)"),
-        ("Boeing 737 fuel leak incident", True, "匹配：(boeing+737)+(fuel+leak)"),
-        ("Airbus A320 maintenance check", False, "不匹配：缺少engine/failure/fuel/leak"),
-        ("Engine failure on aircraft", False, "不匹配：缺少airbus+a320或boeing+737"),
-    ]
-    for text, expected, desc in test_cases_4:
-        result = expr_match(
-            "((airbus+a320)|(boeing+737))+((engine+failure)|(fuel+leak))", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试5: 多关键词OR链 - A|B|C|D|E
-    print("\n【测试5】长OR链（5个关键词）")
-    print("规则: crash|accident|incident|emergency|disaster")
-    test_cases_5 = [
-        ("Major disaster strikes city", True, "匹配：disaster"),
-        ("Emergency landing successful", True, "匹配：emergency"),
-        ("Routine flight completed", False, "不匹配：无关键词"),
-    ]
-    for text, expected, desc in test_cases_5:
-        result = expr_match("crash|accident|incident|emergency|disaster", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试6: 多关键词AND链 - A+B+C+D+E
-    print("\n【测试6】长AND链（5个关键词）")
-    print("规则: airbus+a320+engine+failure+investigation")
-    test_cases_6 = [
-        ("Airbus A320 engine failure investigation underway", True, "匹配：全部5个关键词"),
-        ("Airbus A320 engine failure reported", False, "不匹配：缺少investigation"),
-        ("Engine failure investigation on aircraft", False, "不匹配：缺少airbus+a320"),
-    ]
-    for text, expected, desc in test_cases_6:
-        result = expr_match("airbus+a320+engine+failure+investigation", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试7: 极端复杂 - (A|(B+C)|(D+E+F))+(G|(H+I))
-    print("\n【测试7】不对称嵌套结构")
-    print("规则: (crash|(accident+fatal)|(incident+injury+report))+(pilot|(crew+error))")
-    test_cases_7 = [
-        ("Fatal accident involving pilot", True, "匹配：(accident+fatal)+pilot"),
-        ("Incident injury report crew error", True,
-         "匹配：(incident+injury+report)+(crew+error)"),
-        ("Crash during flight", False, "不匹配：缺少pilot/crew/error"),
-        ("Pilot training session", False, "不匹配：缺少crash/accident/incident等"),
-    ]
-    for text, expected, desc in test_cases_7:
-        result = expr_match(
-            "(crash|(accident+fatal)|(incident+injury+report))+(pilot|(crew+error))", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试8: 三个并列OR组 - (A|B)+(C|D)+(E|F)+(G|H)
-    print("\n【测试8】四组OR的AND组合")
-    print("规则: (airbus|boeing)+(a320|737)+(engine|fuel)+(failure|leak)")
-    test_cases_8 = [
-        ("Airbus A320 engine failure analysis",
-         True, "匹配：airbus+a320+engine+failure"),
-        ("Boeing 737 fuel leak detected", True, "匹配：boeing+737+fuel+leak"),
-        ("Airbus A320 engine maintenance", False, "不匹配：缺少failure/leak"),
-        ("Engine failure on aircraft", False, "不匹配：缺少airbus/boeing和a320/737"),
-    ]
-    for text, expected, desc in test_cases_8:
-        result = expr_match(
-            "(airbus|boeing)+(a320|737)+(engine|fuel)+(failure|leak)", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试9: 深度嵌套 - (((A+B)|C)+D)|(E+F)
-    print("\n【测试9】深度嵌套（3层括号）")
-    print("规则: (((airbus+a320)|boeing)+safety)|(crash+investigation)")
-    test_cases_9 = [
-        ("Airbus A320 safety review", True, "匹配：(airbus+a320)+safety"),
-        ("Boeing safety protocols", True, "匹配：boeing+safety"),
-        ("Crash investigation report", True, "匹配：crash+investigation"),
-        ("Airbus maintenance check", False, "不匹配：不符合任何分支"),
-    ]
-    for text, expected, desc in test_cases_9:
-        result = expr_match(
-            "(((airbus+a320)|boeing)+safety)|(crash+investigation)", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    # 测试10: 超长OR+AND混合
-    print("\n【测试10】超长混合表达式（10个关键词）")
-    print("规则: (airbus|boeing|embraer)+(a320|737|e190)+(engine|fuel|hydraulic)+(failure|leak|malfunction)")
-    test_cases_10 = [
-        ("Embraer E190 hydraulic malfunction", True,
-         "匹配：embraer+e190+hydraulic+malfunction"),
-        ("Airbus A320 fuel leak emergency", True, "匹配：airbus+a320+fuel+leak"),
-        ("Boeing 737 engine maintenance", False, "不匹配：缺少failure/leak/malfunction"),
-    ]
-    for text, expected, desc in test_cases_10:
-        result = expr_match(
-            "(airbus|boeing|embraer)+(a320|737|e190)+(engine|fuel|hydraulic)+(failure|leak|malfunction)", text)
-        status = "✓" if bool(result) == expected else "✗"
-        print(f"  {status} {desc}")
-        print(f"    文本: {text}")
-        print(f"    结果: {result}")
-
-    print("\n" + "=" * 80)
-    print("测试完成！")
-    print("=" * 80)
-
-    # 显示缓存统计
-    print("\n【缓存统计】")
-    cache_info = get_cache_info()
-    print(f"缓存版本: {cache_info['version']}")
-    print(f"简单搜索缓存: {cache_info['simple_cache']}")
-    print(f"正则搜索缓存: {cache_info['regex_cache']}")
-    print(f"表达式解析缓存: {cache_info['expression_cache']}")
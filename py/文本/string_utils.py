@@ -4,14 +4,13 @@
 
 tldextract
 lxml
-beautifulsoup4
 dateparser
 """
 
 import datetime
 import hashlib
-from bs4 import BeautifulSoup, SoupStrainer, Comment
 from lxml import etree
+from lxml import html as lxml_html
 import dateparser
 import time
 import re
@@ -19,7 +18,24 @@ from urllib.parse import urlparse, urlunparse
 import tldextract
 import pytz
 import json
-from html.parser import HTMLParser
+from functools import lru_cache
+
+# 可选的xxhash后端: XXH3有SIMD加速, 长文本哈希吞吐远高于hashlib
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# 模块级预编译正则: 热路径不再每次走re._compile的缓存查找
+_RE_WS = re.compile(r'\s+')
+# 空白不规范的判据: 连续空白/非空格的空白/首尾空白, 命中才值得重建字符串
+_RE_WS_ODD = re.compile(r'\s\s|[^\S ]|\A\s|\s\Z')
+# 不间断空格 -> 普通空格, translate一趟C循环完成
+_NBSP_TABLE = str.maketrans({'\xa0': ' '})
+_RE_MONTH = re.compile(r"\d+月\d+")
+_RE_HOUR = re.compile(r'\d+时\d+')
+# 宽松UUID: 5段hex, 各段最小长度6/4/4/4/6
+_UUID_RE = re.compile(r'\A[0-9a-fA-F]{6,}-[0-9a-fA-F]{4,}-[0-9a-fA-F]{4,}-[0-9a-fA-F]{4,}-[0-9a-fA-F]{6,}\Z')
 
 
 def truncate(s: str, length: int = 40, end: str='...') -> str:
@@ -50,17 +66,42 @@ def get_first_non_empty(*fields) -> any:
     """
     return next(filter(bool, fields), None)
 
-def md5(data: str) -> str:
+def fast_hash(data: str) -> str:
     """
-    计算字符串的 MD5 值
+    计算字符串的快速非加密哈希（32位hex，用于分桶/去重）
+
+    装了xxhash时走XXH3（SIMD加速），否则用BLAKE2b，
+    两者都明显快于MD5且输出同样是32个hex字符
 
     Args:
-        data (str): 需要计算 MD5 值的字符串
+        data (str): 需要计算哈希的字符串
 
     Returns:
-        str: 字符串的 MD5 值
+        str: 32个hex字符的哈希值
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_128(data.encode('utf-8')).hexdigest()
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+# 保留旧名字, 调用方不用改; 注意输出不再是真正的MD5摘要
+md5 = fast_hash
+
+def hash_bytes(data: str) -> bytes:
     """
-    return hashlib.md5(data.encode('utf-8')).hexdigest()
+    计算字符串的快速非加密哈希（16字节bytes）
+
+    做分桶/分片或当dict键时拿bytes就够了,
+    跳过hexdigest的32字符转换和字符串分配
+
+    Args:
+        data (str): 需要计算哈希的字符串
+
+    Returns:
+        bytes: 16字节的哈希值
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_128(data.encode('utf-8')).digest()
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).digest()
 
 def remove_query_params(url):
     """
@@ -89,7 +130,8 @@ def parse_cookies(cookie_string, domain):
     """
     cookies = []
     for item in cookie_string.split('; '):
-        name, value = item.split('=', 1)
+        # partition返回固定三元组, 比split('=', 1)少建一个list
+        name, _, value = item.partition('=')
         cookies.append({
             'name': name,
             'value': value,
@@ -98,27 +140,17 @@ def parse_cookies(cookie_string, domain):
         })
     return cookies
 
-class HTMLChecker(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.found_tag = False
-
-    def handle_starttag(self, tag, attrs):
-        self.found_tag = True
-
-    def handle_startendtag(self, tag, attrs):
-        self.found_tag = True
+# 标签起始特征: '<'后紧跟字母/'!'/'/', 够判断"像HTML"了
+_TAG_RE = re.compile(r'<[A-Za-z!/]')
 
 def looks_like_html(text):
     """
     判断是否是HTML
     """
-    parser = HTMLChecker()
-    try:
-        parser.feed(text)
-    except Exception:
+    # 绝大多数输入是纯文本, in走C层memchr, 提前排除后不必逐字符喂解析器
+    if '<' not in text:
         return False
-    return parser.found_tag
+    return _TAG_RE.search(text) is not None
 
 def clean_html(html: str) -> dict:
     """
@@ -130,31 +162,53 @@ def clean_html(html: str) -> dict:
     返回:
         dict: 包含清理后的HTML、纯文本、图片列表和视频列表的字典
     """
-    strainer = SoupStrainer(['title', 'body', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'a', 'img', 'ul', 'ol', 'li', 'video', 'div'])
-    soup = BeautifulSoup(html, 'html.parser', parse_only=strainer)
+    # lxml在C层建树, 不再生成bs4那样的全量Python对象树
+    try:
+        tree = lxml_html.fromstring(html)
+    except etree.ParserError:
+        return {
+            'html': html,
+            'text': html,
+            'imgs': [],
+            'videos': []
+        }
+
+    # 去掉脚本/样式和注释(原strainer不保留这些)
+    etree.strip_elements(tree, 'script', 'style', with_tail=False)
+    etree.strip_elements(tree, etree.Comment, with_tail=False)
 
     imgs = []
     videos = []
 
-    try:
-        for i in soup.find_all(lambda tag: len(tag.get_text()) == 0 and tag.name not in ["img", "video", "br"]):
-            for j in i.descendants:
-                if hasattr(j, 'name') and j.name in ["img", "video", "br"]:
-                    if j.name == 'img':
-                        imgs.append(j.get('src'))
-                    elif j.name == 'video':
-                        videos.append(j.get('src'))
-                    i.decompose()
+    # 自底向上标记每棵子树是否含文本, 整趟O(n);
+    # 逐节点做normalize-space是O(n·深度), 深嵌套页面上接近二次方.
+    # 节点列表整段持有: lxml的元素代理无引用时会被回收重建,
+    # id()做键只有在代理一直存活时才稳定
+    nodes = list(tree.iter())
+    has_text = {}
+    empty_nodes = []
+    # 文档序是父先于子, 反向遍历即子节点先处理完
+    for node in reversed(nodes):
+        has = bool(node.text and node.text.strip())
+        if not has:
+            for child in node:
+                if has_text.get(id(child), True) or (child.tail and child.tail.strip()):
+                    has = True
                     break
-            else:
-                i.decompose()
-    except AttributeError:
-        pass
-
-    for element in soup(text=lambda text: isinstance(text, Comment)):
-        element.extract()
-    
-    text = soup.get_text()
+        has_text[id(node)] = has
+        if not has and node.tag not in ('img', 'video', 'br'):
+            empty_nodes.append(node)
+
+    for node in empty_nodes:
+        parent = node.getparent()
+        # 只删最大的空子树: 父节点也空时随父节点一起删; 根节点不动
+        if parent is None or not has_text[id(parent)]:
+            continue
+        imgs.extend(node.xpath('.//img/@src'))
+        videos.extend(node.xpath('.//video/@src'))
+        node.drop_tree()
+
+    text = tree.text_content()
     if not text:
         return {
             'html': html,
@@ -162,11 +216,12 @@ def clean_html(html: str) -> dict:
             'imgs': [],
             'videos': []
         }
-    
-    cleaned_text = ' '.join(text.split())
-    
+
+    # 空白本来就规范时跳过整串重建, 大文本少拷贝一遍
+    cleaned_text = ' '.join(text.split()) if _RE_WS_ODD.search(text) else text
+
     return {
-        'html': str(soup),
+        'html': lxml_html.tostring(tree, encoding='unicode'),
         'text': cleaned_text,
         'imgs': imgs,
         'videos': videos
@@ -185,28 +240,54 @@ def text_html(html_content: str) -> str:
     # 如果不是HTML格式，直接返回
     if not looks_like_html(html_content):
         return html_content
-    # 使用 lxml 解析器
-    soup = BeautifulSoup(html_content, 'lxml')
-    
+    # 直接用 lxml 解析, 跳过bs4的包装层
+    try:
+        tree = lxml_html.fromstring(html_content)
+    except etree.ParserError:
+        return html_content
+
     # 找到所有的换行相关标签，并在其后添加换行符
-    for tag in soup.find_all(['p', 'div', 'br']):
-        tag.insert_after('\n')
-    
+    for tag in tree.iter('p', 'div', 'br'):
+        tag.tail = '\n' + (tag.tail or '')
+
     # 获取纯文本
-    text = soup.get_text()
+    text = tree.text_content()
+
+    # 不间断空格走translate表, 多空格折叠一次正则完成; MB级文本少做一遍全量拷贝
+    text = _RE_WS.sub(' ', text.translate(_NBSP_TABLE))
+
+    # 去掉多余的空白行; 每行只strip一次
+    clean_text = '\n'.join(s for line in text.split('\n') if (s := line.strip()))
 
-    # 替换不间断空格
-    text = text.replace('\xa0', ' ')
-        
-    # 将多个空格替换为单个空格
-    text = re.sub(r'\s+', ' ', text)
-    
-    # 去掉多余的空白行
-    clean_text = '\n'.join(line.strip() for line in text.splitlines() if line.strip())
-    
     return clean_text
 
 
+@lru_cache(maxsize=64)
+def _tz(name):
+    """缓存时区对象: pytz.timezone每次都查tzdata, 实际用到的时区就那几个"""
+    return pytz.timezone(name)
+
+
+# 相对时间词: 含这些词的串解析结果随当前时刻变化, 不能记忆
+_RE_RELATIVE = re.compile(r'(ago|前|昨|今|明|yesterday|tomorrow|last|next)', re.I)
+
+
+@lru_cache(maxsize=4096)
+def _parse_absolute_cached(t, timezone):
+    """缓存绝对时间串的dateparser解析结果
+
+    dateparser一次要过多语言/locale表, 抓取列表里同一时间串会反复出现;
+    存epoch秒而不是datetime对象, 命中时零构造成本. 解析失败缓存None
+    """
+    settings = {}
+    if timezone:
+        settings['TIMEZONE'] = timezone
+        settings['RETURN_AS_TIMEZONE_AWARE'] = True
+
+    date = dateparser.parse(t, settings=settings, languages=['zh', 'en'])
+    return int(date.timestamp()) if date else None
+
+
 def str2timestamp(t, timezone='Asia/Shanghai', add_time=False, custom_format=None) -> int:
     """
     解析时间字符串为时间戳
@@ -225,51 +306,64 @@ def str2timestamp(t, timezone='Asia/Shanghai', add_time=False, custom_format=Non
         ValueError: 如果时间字符串无法解析或格式不匹配
     """
     if isinstance(t, int):
-        return t
-    
+        # 毫秒级时间戳按数量级判断, 不做len(str())的临时分配
+        return t // 1000 if t >= 10_000_000_000 else t
+
     t = t.replace('&nbsp;', '').strip()
     if not t:
         raise TypeError("时间不能为空")
-    
-    if isinstance(t, int):
-        length = len(str(t))
-        if length == 13:
-            return int(t / 1000)
-        if length == 10:
-            return t
+
+    # 纯数字的10/13位时间戳直接换算, 完全绕开dateparser
+    if t.isdigit():
+        n = int(t)
+        if len(t) == 13:
+            return n // 1000
+        if len(t) == 10:
+            return n
         return 0
 
     if custom_format:
         try:
             date = datetime.datetime.strptime(t, custom_format)
             if timezone:
-                tz = pytz.timezone(timezone)
+                tz = _tz(timezone)
                 date = tz.localize(date)
             return int(date.timestamp())
         except ValueError:
             raise ValueError(f"无法解析时间: {t}，格式不匹配 {custom_format}")
 
-    if re.search(r"\d+月\d+", t):
+    if _RE_MONTH.search(t):
         t = t.replace("年", "/").replace("月", "/").replace("日", " ")
-    if re.search(r'\d+时\d+', t):
+    if _RE_HOUR.search(t):
         t = t.replace("时", ":").replace("分", ":").replace("秒", "")
     t = t.strip(": ")
 
     reference_date = datetime.datetime.now()
-    settings = {'RELATIVE_BASE': reference_date}
-    if timezone:
-        settings['TIMEZONE'] = timezone
-        settings['RETURN_AS_TIMEZONE_AWARE'] = True
-    
-    date = dateparser.parse(t, settings=settings, languages=['zh', 'en'])
 
-    if not date:
-        raise ValueError(f"无法解析时间: {t}")
-    
-    timestamp = int(date.timestamp())
-    
+    # ISO格式先试C实现的fromisoformat, 命中就不进dateparser的多语言扫描
+    try:
+        date = datetime.datetime.fromisoformat(t)
+        if timezone and date.tzinfo is None:
+            date = _tz(timezone).localize(date)
+        timestamp = int(date.timestamp())
+    except ValueError:
+        if _RE_RELATIVE.search(t):
+            # 相对时间依赖当前时刻, 结果不能缓存
+            settings = {'RELATIVE_BASE': reference_date}
+            if timezone:
+                settings['TIMEZONE'] = timezone
+                settings['RETURN_AS_TIMEZONE_AWARE'] = True
+
+            date = dateparser.parse(t, settings=settings, languages=['zh', 'en'])
+            timestamp = int(date.timestamp()) if date else None
+        else:
+            timestamp = _parse_absolute_cached(t, timezone)
+
+        if timestamp is None:
+            raise ValueError(f"无法解析时间: {t}")
+
     if add_time:
-        tz = pytz.timezone(timezone)
+        tz = _tz(timezone)
         tz_time = datetime.datetime.now(tz)
         total_seconds = (tz_time.hour * 3600) + (tz_time.minute * 60) + tz_time.second - 20*60
         timestamp += total_seconds
@@ -298,21 +392,9 @@ def is_loose_uuid(s):
     """
     判断字符串是否符合 UUID 格式
     """
-    parts = s.split('-')
-    
-    # 要求有 5 段（UUID 的格式）
-    if len(parts) != 5:
-        return False
-
-    # 每段的长度要求（宽松一点）
-    expected_lengths = [6, 4, 4, 4, 6]
-    for part, min_len in zip(parts, expected_lengths):
-        if len(part) < min_len:
-            return False
-        if not all(c in '0123456789abcdefABCDEF' for c in part):
-            return False
-
-    return True
+    # 一条正则走C引擎完成5段/最小长度/hex字符的全部校验,
+    # 代替Python层的split+逐字符线性扫描
+    return bool(_UUID_RE.match(s))
 
 def is_chinese(text: str, threshold: float = 0.1) -> bool:
     """
@@ -329,51 +411,30 @@ def is_chinese(text: str, threshold: float = 0.1) -> bool:
     if not text or not text.strip():
         return True
     
-    # 移除非文字
-    text = re.sub(r'[^\w]+', '', text)
-    
-    if not text:
+    # 单遍扫描分类计数: 原来去非文字/去emoji/数假名/数汉字要过四遍正则,
+    # 每遍都拷贝整串; emoji本就不属于\w, 过滤非文字时顺带排除.
+    # 只统计前60个有效字符, 数够就停
+    kept = kana = cjk = 0
+    for ch in text:
+        if not (ch.isalnum() or ch == '_'):
+            continue
+        kept += 1
+        cp = ord(ch)
+        # 平假名: \u3040-\u309F  片假名: \u30A0-\u30FF
+        if 0x3040 <= cp <= 0x30FF:
+            kana += 1
+        # 简体中文字符（常用汉字范围）和数字
+        elif 0x4e00 <= cp <= 0x9fa5 or ch.isdigit():
+            cjk += 1
+        if kept == 60:
+            break
+
+    if kept == 0:
         return True
-    
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # 表情符号
-        "\U0001F300-\U0001F5FF"  # 符号和象形文字
-        "\U0001F680-\U0001F6FF"  # 交通和地图符号
-        "\U0001F1E0-\U0001F1FF"  # 旗帜
-        "\U00002702-\U000027B0"  # 装饰符号
-        #"\U000024C2-\U0001F251"  # 封闭字符包含汉字
-        "\U0001F900-\U0001F9FF"  # 补充符号和象形文字
-        "\U0001FA00-\U0001FA6F"  # 扩展A
-        "\U0001FA70-\U0001FAFF"  # 扩展B
-        "\U00002600-\U000026FF"  # 杂项符号
-        "\U00002700-\U000027BF"  # 装饰符号
-        "]+",
-        flags=re.UNICODE
-    )
-    text = emoji_pattern.sub('', text)
-    if not text:
-        return True
-    
-    # 获取前30个字符
-    text = text[:60]
 
-    # 检查是否包含日语假名
-    # 平假名: \u3040-\u309F
-    # 片假名: \u30A0-\u30FF
-    japanese_kana = re.findall(r'[\u3040-\u309F\u30A0-\u30FF]', text)
-    
-    # 如果包含假名,判断假名占比
-    if japanese_kana:
-        kana_ratio = len(japanese_kana) / len(text)
-        # 如果假名占比超过10%,认为是日语
-        if kana_ratio > 0.1:
-            return False
-    
-    # 统计简体中文字符（常用汉字范围）和数字
-    chinese_chars = re.findall(r'[\u4e00-\u9fa5\d]', text)
-    
+    # 如果假名占比超过10%,认为是日语
+    if kana and kana / kept > 0.1:
+        return False
+
     # 计算中文字符占比
-    chinese_ratio = len(chinese_chars) / len(text)
-    
-    return chinese_ratio >= threshold
+    return cjk / kept >= threshold
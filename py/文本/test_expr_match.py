@@ -0,0 +1,368 @@
+# expr_match 使用示例/自测脚本: 从主模块拆出来, 导入expr_match时不再解析这几百行用例
+from expr_match import expr_match, get_cache_info
+
+
+if __name__ == "__main__":
+
+    print("\n" * 2)
+    print("=" * 80)
+    print("简单规则测试")
+    print("=" * 80)
+
+    # 测试1: 单个关键词
+    print("\n【测试1】单个关键词匹配")
+    print("规则: airbus")
+    test_cases_1 = [
+        ("Airbus announces new aircraft", True, "匹配：airbus"),
+        ("Boeing 737 update", False, "不匹配：无airbus"),
+        ("AIRBUS A320 safety", True, "匹配：大写AIRBUS"),
+        ("The airbus fleet", True, "匹配：小写airbus"),
+    ]
+    for text, expected, desc in test_cases_1:
+        result = expr_match("airbus", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试2: 两个关键词OR
+    print("\n【测试2】两个关键词OR")
+    print("规则: airbus|boeing")
+    test_cases_2 = [
+        ("Airbus A320 report", True, "匹配：airbus"),
+        ("Boeing 737 update", True, "匹配：boeing"),
+        ("Airbus and Boeing comparison", True, "匹配：airbus和boeing都有"),
+        ("Embraer aircraft news", False, "不匹配：无airbus或boeing"),
+    ]
+    for text, expected, desc in test_cases_2:
+        result = expr_match("airbus|boeing", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试3: 两个关键词AND
+    print("\n【测试3】两个关键词AND")
+    print("规则: airbus+a320")
+    test_cases_3 = [
+        ("Airbus A320 safety report", True, "匹配：airbus和a320都有"),
+        ("Airbus A350 update", False, "不匹配：有airbus但无a320"),
+        ("A320 aircraft details", False, "不匹配：有a320但无airbus"),
+        ("Boeing 737 news", False, "不匹配：两个都没有"),
+    ]
+    for text, expected, desc in test_cases_3:
+        result = expr_match("airbus+a320", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试4: 三个关键词OR
+    print("\n【测试4】三个关键词OR")
+    print("规则: airbus|boeing|embraer")
+    test_cases_4 = [
+        ("Airbus news", True, "匹配：airbus"),
+        ("Boeing update", True, "匹配：boeing"),
+        ("Embraer aircraft", True, "匹配：embraer"),
+        ("Bombardier jet", False, "不匹配：无任何关键词"),
+    ]
+    for text, expected, desc in test_cases_4:
+        result = expr_match("airbus|boeing|embraer", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试5: 三个关键词AND
+    print("\n【测试5】三个关键词AND")
+    print("规则: airbus+a320+safety")
+    test_cases_5 = [
+        ("Airbus A320 safety report released", True, "匹配：全部三个关键词"),
+        ("Airbus A320 maintenance", False, "不匹配：缺少safety"),
+        ("Airbus safety protocols", False, "不匹配：缺少a320"),
+        ("A320 safety check", False, "不匹配：缺少airbus"),
+    ]
+    for text, expected, desc in test_cases_5:
+        result = expr_match("airbus+a320+safety", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试6: 简单括号 (A|B)+C
+    print("\n【测试6】简单括号组合")
+    print("规则: (airbus|boeing)+safety")
+    test_cases_6 = [
+        ("Airbus safety report", True, "匹配：airbus+safety"),
+        ("Boeing safety update", True, "匹配：boeing+safety"),
+        ("Airbus news", False, "不匹配：缺少safety"),
+        ("Safety regulations", False, "不匹配：缺少airbus或boeing"),
+    ]
+    for text, expected, desc in test_cases_6:
+        result = expr_match("(airbus|boeing)+safety", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试7: 简单括号 A+(B|C)
+    print("\n【测试7】简单括号组合（反向）")
+    print("规则: airbus+(a320|a350)")
+    test_cases_7 = [
+        ("Airbus A320 details", True, "匹配：airbus+a320"),
+        ("Airbus A350 update", True, "匹配：airbus+a350"),
+        ("Airbus A380 news", False, "不匹配：缺少a320或a350"),
+        ("Boeing A320", False, "不匹配：缺少airbus"),
+    ]
+    for text, expected, desc in test_cases_7:
+        result = expr_match("airbus+(a320|a350)", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试8: 两组OR的AND - (A|B)+(C|D)
+    print("\n【测试8】两组OR的AND组合")
+    print("规则: (airbus|boeing)+(a320|737)")
+    test_cases_8 = [
+        ("Airbus A320 report", True, "匹配：airbus+a320"),
+        ("Boeing 737 update", True, "匹配：boeing+737"),
+        ("Airbus 737 hybrid", True, "匹配：airbus+737"),
+        ("Boeing A320 test", True, "匹配：boeing+a320"),
+        ("Airbus A350 news", False, "不匹配：缺少a320或737"),
+        ("Embraer E190", False, "不匹配：两组都不匹配"),
+    ]
+    for text, expected, desc in test_cases_8:
+        result = expr_match("(airbus|boeing)+(a320|737)", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试9: 空文本和空规则
+    print("\n【测试9】边界情况")
+    print("规则: airbus")
+    test_cases_9 = [
+        ("", False, "空文本"),
+        ("   ", False, "纯空格"),
+        ("No match here", False, "完全不匹配"),
+    ]
+    for text, expected, desc in test_cases_9:
+        result = expr_match("airbus", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: '{text}'")
+        print(f"    结果: {result}")
+
+    # 测试10: 特殊字符处理
+    print("\n【测试10】特殊字符和数字")
+    print("规则: a320|737")
+    test_cases_10 = [
+        ("A320 aircraft", True, "匹配：a320（大写）"),
+        ("Boeing 737-800", True, "匹配：737（带连字符）"),
+        ("Flight A320-200", True, "匹配：a320（带连字符）"),
+        ("Model 747", False, "不匹配：不同型号"),
+    ]
+    for text, expected, desc in test_cases_10:
+        result = expr_match("a320|737", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    print("\n" + "=" * 80)
+    print("简单测试完成！")
+    print("=" * 80)
+
+    # 显示缓存统计
+    print("\n【缓存统计】")
+    cache_info = get_cache_info()
+    print(f"缓存版本: {cache_info['version']}")
+    print(f"简单搜索缓存: {cache_info['simple_cache']}")
+    print(f"正则搜索缓存: {cache_info['regex_cache']}")
+    print(f"表达式解析缓存: {cache_info['expression_cache']}")
+    print("\n" * 3)
+    print("=" * 80)
+    print("复杂规则测试")
+    print("=" * 80)
+
+    # 测试1: 三层嵌套 - (A|B)+(C|D)+(E|F)
+    print("\n【测试1】三层OR+AND组合")
+    print("规则: (airbus|boeing)+(a320|737)+(safety|inspection)")
+    test_cases_1 = [
+        ("Airbus A320 safety report", True, "匹配：airbus+a320+safety"),
+        ("Boeing 737 inspection update", True, "匹配：boeing+737+inspection"),
+        ("Airbus A350 safety report", False, "不匹配：缺少a320/737"),
+        ("Boeing safety protocols", False, "不匹配：缺少a320/737"),
+    ]
+    for text, expected, desc in test_cases_1:
+        result = expr_match(
+            "(airbus|boeing)+(a320|737)+(safety|inspection)", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试2: 四层嵌套 - ((A+B)|(C+D))+(E|F)
+    print("\n【测试2】嵌套AND在OR内部")
+    print("规则: ((airbus+a320)|(boeing+737))+(defect|flaw)")
+    test_cases_2 = [
+        ("Airbus A320 defect found", True, "匹配：(airbus+a320)+defect"),
+        ("Boeing 737 flaw detected", True, "匹配：(boeing+737)+flaw"),
+        ("Airbus defect report", False, "不匹配：缺少a320"),
+        ("Boeing 737 update", False, "不匹配：缺少defect/flaw"),
+    ]
+    for text, expected, desc in test_cases_2:
+        result = expr_match("((airbus+a320)|(boeing+737))+(defect|flaw)", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试3: 五层复杂嵌套 - (A|(B+C))+(D|(E+F))
+    print("\n【测试3】混合OR和AND的对称结构")
+    print("规则: (crash|(accident+investigation))+(pilot|(crew+training))")
+    test_cases_3 = [
+        ("Crash involving pilot error", True, "匹配：crash+pilot"),
+        ("Accident investigation crew training", True,
+         "匹配：(accident+investigation)+(crew+training)"),
+        ("Crash report released", False, "不匹配：缺少pilot/crew/training"),
+        ("Pilot training program", False, "不匹配：缺少crash/accident/investigation"),
+    ]
+    for text, expected, desc in test_cases_3:
+        result = expr_match(
+            "(crash|(accident+investigation))+(pilot|(crew+training))", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试4: 六层超级复杂 - ((A+B)|(C+D))+((E+F)|(G+H))
+    print("\n【测试4】双重嵌套AND+OR组合")
+    print("规则: ((airbus+a320)|(boeing+737))+((engine+failure)|(fuel+leak))")
+    test_cases_4 = [
+        ("Airbus A320 engine failure reported",
+         True, "匹配：(airbus+a320)+(engine+failure)"),
+        ("Boeing 737 fuel leak incident", True, "匹配：(boeing+737)+(fuel+leak)"),
+        ("Airbus A320 maintenance check", False, "不匹配：缺少engine/failure/fuel/leak"),
+        ("Engine failure on aircraft", False, "不匹配：缺少airbus+a320或boeing+737"),
+    ]
+    for text, expected, desc in test_cases_4:
+        result = expr_match(
+            "((airbus+a320)|(boeing+737))+((engine+failure)|(fuel+leak))", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试5: 多关键词OR链 - A|B|C|D|E
+    print("\n【测试5】长OR链（5个关键词）")
+    print("规则: crash|accident|incident|emergency|disaster")
+    test_cases_5 = [
+        ("Major disaster strikes city", True, "匹配：disaster"),
+        ("Emergency landing successful", True, "匹配：emergency"),
+        ("Routine flight completed", False, "不匹配：无关键词"),
+    ]
+    for text, expected, desc in test_cases_5:
+        result = expr_match("crash|accident|incident|emergency|disaster", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试6: 多关键词AND链 - A+B+C+D+E
+    print("\n【测试6】长AND链（5个关键词）")
+    print("规则: airbus+a320+engine+failure+investigation")
+    test_cases_6 = [
+        ("Airbus A320 engine failure investigation underway", True, "匹配：全部5个关键词"),
+        ("Airbus A320 engine failure reported", False, "不匹配：缺少investigation"),
+        ("Engine failure investigation on aircraft", False, "不匹配：缺少airbus+a320"),
+    ]
+    for text, expected, desc in test_cases_6:
+        result = expr_match("airbus+a320+engine+failure+investigation", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试7: 极端复杂 - (A|(B+C)|(D+E+F))+(G|(H+I))
+    print("\n【测试7】不对称嵌套结构")
+    print("规则: (crash|(accident+fatal)|(incident+injury+report))+(pilot|(crew+error))")
+    test_cases_7 = [
+        ("Fatal accident involving pilot", True, "匹配：(accident+fatal)+pilot"),
+        ("Incident injury report crew error", True,
+         "匹配：(incident+injury+report)+(crew+error)"),
+        ("Crash during flight", False, "不匹配：缺少pilot/crew/error"),
+        ("Pilot training session", False, "不匹配：缺少crash/accident/incident等"),
+    ]
+    for text, expected, desc in test_cases_7:
+        result = expr_match(
+            "(crash|(accident+fatal)|(incident+injury+report))+(pilot|(crew+error))", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试8: 三个并列OR组 - (A|B)+(C|D)+(E|F)+(G|H)
+    print("\n【测试8】四组OR的AND组合")
+    print("规则: (airbus|boeing)+(a320|737)+(engine|fuel)+(failure|leak)")
+    test_cases_8 = [
+        ("Airbus A320 engine failure analysis",
+         True, "匹配：airbus+a320+engine+failure"),
+        ("Boeing 737 fuel leak detected", True, "匹配：boeing+737+fuel+leak"),
+        ("Airbus A320 engine maintenance", False, "不匹配：缺少failure/leak"),
+        ("Engine failure on aircraft", False, "不匹配：缺少airbus/boeing和a320/737"),
+    ]
+    for text, expected, desc in test_cases_8:
+        result = expr_match(
+            "(airbus|boeing)+(a320|737)+(engine|fuel)+(failure|leak)", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试9: 深度嵌套 - (((A+B)|C)+D)|(E+F)
+    print("\n【测试9】深度嵌套（3层括号）")
+    print("规则: (((airbus+a320)|boeing)+safety)|(crash+investigation)")
+    test_cases_9 = [
+        ("Airbus A320 safety review", True, "匹配：(airbus+a320)+safety"),
+        ("Boeing safety protocols", True, "匹配：boeing+safety"),
+        ("Crash investigation report", True, "匹配：crash+investigation"),
+        ("Airbus maintenance check", False, "不匹配：不符合任何分支"),
+    ]
+    for text, expected, desc in test_cases_9:
+        result = expr_match(
+            "(((airbus+a320)|boeing)+safety)|(crash+investigation)", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    # 测试10: 超长OR+AND混合
+    print("\n【测试10】超长混合表达式（10个关键词）")
+    print("规则: (airbus|boeing|embraer)+(a320|737|e190)+(engine|fuel|hydraulic)+(failure|leak|malfunction)")
+    test_cases_10 = [
+        ("Embraer E190 hydraulic malfunction", True,
+         "匹配：embraer+e190+hydraulic+malfunction"),
+        ("Airbus A320 fuel leak emergency", True, "匹配：airbus+a320+fuel+leak"),
+        ("Boeing 737 engine maintenance", False, "不匹配：缺少failure/leak/malfunction"),
+    ]
+    for text, expected, desc in test_cases_10:
+        result = expr_match(
+            "(airbus|boeing|embraer)+(a320|737|e190)+(engine|fuel|hydraulic)+(failure|leak|malfunction)", text)
+        status = "✓" if bool(result) == expected else "✗"
+        print(f"  {status} {desc}")
+        print(f"    文本: {text}")
+        print(f"    结果: {result}")
+
+    print("\n" + "=" * 80)
+    print("测试完成！")
+    print("=" * 80)
+
+    # 显示缓存统计
+    print("\n【缓存统计】")
+    cache_info = get_cache_info()
+    print(f"缓存版本: {cache_info['version']}")
+    print(f"简单搜索缓存: {cache_info['simple_cache']}")
+    print(f"正则搜索缓存: {cache_info['regex_cache']}")
+    print(f"表达式解析缓存: {cache_info['expression_cache']}")
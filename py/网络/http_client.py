@@ -1,11 +1,84 @@
 import httpx
 import asyncio
+import atexit
+import importlib.util
+import inspect
+import json
+import os
+import random
 import socket
+import ssl
+import threading
 import time
-import sqlite3
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, Tuple, Optional, ClassVar
+from urllib.parse import urljoin
 import logging
-from utils.logger import logger
+
+# utils.logger在本仓库并不存在, 直接用标准库logger; 由调用方配置handler
+logger = logging.getLogger(__name__)
+
+# 可选的aiodns后端: 原生异步解析; 未安装时降级到线程池里的getaddrinfo
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
+
+_DNS_ERRORS = (OSError,) if aiodns is None else (OSError, aiodns.error.DNSError)
+
+# 值得重试的状态码: 服务端过载/网关抖动/限流
+_RETRIABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+# 只有幂等方法才按状态码重试, POST重发可能造成重复写入
+_IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'})
+
+
+@lru_cache(maxsize=1024)
+def _join_url(base: str, path: str) -> str:
+    """缓存base_url拼接结果
+
+    urljoin每次都要拆解重组URL; 稳态客户端的端点就那几个,
+    同样的(base, path)直接取缓存
+    """
+    return urljoin(base, path)
+
+
+@lru_cache(maxsize=4)
+def _ssl_ctx(verify: bool = True):
+    """共享SSL上下文
+
+    create_default_context要解析整套CA信任库(毫秒级), 同进程的多个
+    客户端各建一份纯属浪费; 按verify取同一个缓存实例
+    """
+    return ssl.create_default_context() if verify else False
+
+
+def _backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """指数退避+随机抖动: 封顶防止长睡, 抖动把同时失败的重试错开"""
+    return min(base * (2 ** attempt), cap) + random.random() * base
+
+
+def normalize_etag(etag_value: str) -> str:
+    """规范化 ETag, 用于跨节点/跨编码比对
+
+    去掉弱校验前缀W/和引号; 同一资源经gzip或不同机器可能带不同的
+    '-xxx'后缀, 截掉后才能命中条件请求缓存
+
+    Args:
+        etag_value: 原始 ETag 头的值
+
+    Returns:
+        str: 规范化后的 ETag
+    """
+    if etag_value.startswith('W/'):
+        etag_value = etag_value[2:]
+    etag_value = etag_value.strip('"')
+    # '-[^-]*$'语义就是"从最后一个'-'截断": rfind+切片一趟C循环搞定,
+    # 不必走正则引擎
+    dash = etag_value.rfind('-')
+    if dash != -1:
+        etag_value = etag_value[:dash]
+    return etag_value
 # 关闭第三方库的 DEBUG 日志
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -13,239 +86,507 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 logging.getLogger("asyncio").setLevel(logging.WARNING)
 
 class PersistentDNSCache:
-    """持久化 DNS 缓存管理器"""
-    
-    def __init__(self, db_path: str = "dns_cache.db"):
+    """持久化 DNS 缓存管理器
+
+    缓存最多几千条主机名且读多写少, SQLite的连接/解析/行解码在这种
+    规模下是纯开销: 数据直接放进程内dict, get是一次字典查询;
+    后台线程定期把快照写成JSON文件(os.replace原子替换), 重启时加载
+    """
+
+    _SNAPSHOT_INTERVAL = 30.0  # 快照间隔秒数
+
+    def __init__(self, db_path: str = "dns_cache.json"):
         self.db_path = db_path
-        self._init_db()
-    
-    def _init_db(self):
-        """初始化数据库"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS dns_cache (
-                hostname TEXT PRIMARY KEY,
-                ip TEXT NOT NULL,
-                expire_time REAL NOT NULL,
-                created_at REAL NOT NULL,
-                updated_at REAL NOT NULL
-            )
-        """)
-        conn.commit()
-        conn.close()
-        logger.info(f"✅ DNS 缓存数据库初始化完成: {self.db_path}")
-    
+        self._lock = threading.Lock()
+        self._mem: Dict[str, Tuple[str, float]] = {}  # hostname -> (ip, expire_time)
+        self._dirty = False
+        self._load()
+        atexit.register(self.flush)
+
+        # 后台快照线程, 进程退出时由atexit补最后一刷
+        flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        flusher.start()
+
+    def _load(self):
+        """启动时加载快照, 顺手丢弃已过期条目"""
+        try:
+            with open(self.db_path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            logger.info("✅ DNS 缓存初始化完成(空): %s", self.db_path)
+            return
+        now = time.time()
+        self._mem = {h: (ip, exp) for h, (ip, exp) in data.items() if exp > now}
+        logger.info("✅ DNS 缓存加载完成: %s (%d 条)", self.db_path, len(self._mem))
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self._SNAPSHOT_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("⚠️ DNS 缓存快照失败: %s", e)
+
+    def flush(self):
+        """有变更时把快照原子写盘(临时文件 + os.replace)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._mem)
+            self._dirty = False
+        tmp_path = self.db_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.db_path)
+        except OSError as e:
+            # 写盘失败只降级为丢一次快照, 不影响内存缓存
+            logger.warning("⚠️ DNS 缓存快照写入失败: %s", e)
+
     def get(self, hostname: str) -> Optional[str]:
-        """获取缓存的 IP"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT ip, expire_time FROM dns_cache WHERE hostname = ?",
-            (hostname,)
-        )
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            ip, expire_time = result
+        """获取缓存的 IP(纯内存读, 零IO)"""
+        entry = self._mem.get(hostname)
+        if entry:
+            ip, expire_time = entry
             if time.time() < expire_time:
-                logger.debug(f"✅ DNS 缓存命中 (数据库): {hostname} -> {ip}")
                 return ip
-            else:
-                # 过期，删除
-                self.delete(hostname)
-                logger.info(f"⏰ DNS 缓存过期 (数据库): {hostname}")
-        
+            # 过期，删除
+            self.delete(hostname)
+            logger.info("⏰ DNS 缓存过期: %s", hostname)
         return None
-    
+
     def set(self, hostname: str, ip: str, ttl: int):
         """设置 DNS 缓存"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        expire_time = time.time() + ttl
-        now = time.time()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO dns_cache 
-            (hostname, ip, expire_time, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (hostname, ip, expire_time, now, now))
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"💾 DNS 缓存已保存 (数据库): {hostname} -> {ip} (TTL: {ttl}s)")
-    
+        with self._lock:
+            self._mem[hostname] = (ip, time.time() + ttl)
+            self._dirty = True
+        logger.debug("💾 DNS 缓存已保存: %s -> %s (TTL: %ds)", hostname, ip, ttl)
+
     def delete(self, hostname: str):
         """删除缓存"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM dns_cache WHERE hostname = ?", (hostname,))
-        conn.commit()
-        conn.close()
-    
+        with self._lock:
+            if self._mem.pop(hostname, None) is not None:
+                self._dirty = True
+
     def clear(self):
         """清空所有缓存"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM dns_cache")
-        conn.commit()
-        conn.close()
-        logger.info("🧹 DNS 缓存已清空 (数据库)")
-    
+        with self._lock:
+            self._mem.clear()
+            self._dirty = True
+        logger.info("🧹 DNS 缓存已清空")
+
     def cleanup_expired(self):
         """清理过期缓存"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM dns_cache WHERE expire_time < ?", (time.time(),))
-        deleted = cursor.rowcount
-        conn.commit()
-        conn.close()
-        if deleted > 0:
-            logger.info(f"🧹 清理了 {deleted} 条过期 DNS 缓存")
-        return deleted
-    
+        now = time.time()
+        with self._lock:
+            expired = [h for h, (_, exp) in self._mem.items() if exp <= now]
+            for hostname in expired:
+                del self._mem[hostname]
+            if expired:
+                self._dirty = True
+        if expired:
+            logger.info("🧹 清理了 %d 条过期 DNS 缓存", len(expired))
+        return len(expired)
+
     def get_stats(self) -> dict:
         """获取缓存统计"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 总数
-        cursor.execute("SELECT COUNT(*) FROM dns_cache")
-        total = cursor.fetchone()[0]
-        
-        # 有效数量
-        cursor.execute("SELECT COUNT(*) FROM dns_cache WHERE expire_time > ?", (time.time(),))
-        valid = cursor.fetchone()[0]
-        
-        # 详细信息
-        cursor.execute("SELECT hostname, ip, expire_time FROM dns_cache")
-        domains = {}
+        snapshot = dict(self._mem)
         current_time = time.time()
-        
-        for hostname, ip, expire_time in cursor.fetchall():
+
+        domains = {}
+        valid = 0
+        for hostname, (ip, expire_time) in snapshot.items():
+            is_valid = expire_time > current_time
+            valid += is_valid
             domains[hostname] = {
                 "ip": ip,
                 "expires_in": max(0, int(expire_time - current_time)),
-                "is_valid": expire_time > current_time
+                "is_valid": is_valid
             }
-        
-        conn.close()
-        
+
         return {
-            "total_cached": total,
+            "total_cached": len(snapshot),
             "valid_entries": valid,
-            "expired_entries": total - valid,
+            "expired_entries": len(snapshot) - valid,
             "domains": domains
         }
 
 
 
+class DNSCacheTransport(httpx.AsyncHTTPTransport):
+    """在传输层做 DNS 改写的 AsyncHTTPTransport
+
+    连接前把目标主机换成缓存解析出的IP, 原域名通过sni_hostname扩展
+    留给TLS握手, 证书校验和Host头都不受影响; 请求URL在日志里保持原样
+    """
+
+    def __init__(self, client: "HttpClient", **kwargs):
+        super().__init__(**kwargs)
+        self._client = client
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        hostname = request.url.host
+        ip = await self._client._resolve_dns(hostname)
+        if ip and ip != hostname:
+            # Host头在构建请求时已按原URL写好, 这里只换连接目标
+            request.extensions.setdefault("sni_hostname", hostname)
+            request.url = request.url.copy_with(host=ip)
+        return await super().handle_async_request(request)
+
+
 class HttpClient(httpx.AsyncClient):
     """带持久化 DNS 缓存和自动重试的 httpx.AsyncClient"""
-    
+
     # 类级别的缓存管理器
     _dns_cache: ClassVar[Optional[PersistentDNSCache]] = None
-    _global_lock: ClassVar[asyncio.Lock] = None
-    
-    def __init__(self, dns_ttl: int = 600, dns_cache_db: str = "dns_cache.db", *args, **kwargs):
+
+    def __init__(self, dns_ttl: int = 600, dns_cache_db: str = "dns_cache.json",
+                 max_connections: int = 100, max_keepalive_connections: int = 40,
+                 keepalive_expiry: float = 30.0, etag_cache_size: int = 256,
+                 logger: Optional[logging.Logger] = None, *args, **kwargs):
         """
         Args:
             dns_ttl: DNS 缓存时间（秒），默认 10 分钟
             dns_cache_db: DNS 缓存数据库路径
+            max_connections: 连接池总连接上限
+            max_keepalive_connections: 保活连接上限
+            keepalive_expiry: 保活连接过期时间（秒）
+            etag_cache_size: ETag条件请求缓存条数, 0关闭
+            logger: 自定义logger, 默认用模块logger
         """
-        super().__init__(*args, **kwargs)
+        self.logger = logger or logging.getLogger(__name__)
+        # 默认池(10保活)在高并发下排队; 调大并暴露参数, 突发流量复用
+        # 已有socket而不是排队新建+TLS握手. 调用方自带limits时不覆盖
+        limits = kwargs.pop('limits', None) or httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        # HTTP/2默认开启: 单连接多路复用省掉逐请求TLS握手, HPACK压头;
+        # 需要 pip install 'httpx[http2]', 未装h2时回退HTTP/1.1
+        http2 = kwargs.pop('http2', True)
+        # 先探测h2是否可用: transport和客户端init都会因缺h2抛ImportError,
+        # 事后捕获只能挡住其中一处, 不如进门就降级
+        if http2 and importlib.util.find_spec('h2') is None:
+            self.logger.warning("⚠️ 未安装h2, 回退HTTP/1.1")
+            http2 = False
+        # verify传布尔时换成共享SSL上下文, CA信任库进程内只解析一次
+        verify = kwargs.pop('verify', True)
+        if isinstance(verify, bool):
+            verify = _ssl_ctx(verify)
+        # DNS改写下沉到传输层, 调用方自带transport时不覆盖;
+        # 注意limits/http2要传给transport, 客户端挂了自定义transport后自身的不生效
+        transport = DNSCacheTransport(self, limits=limits, http2=http2, verify=verify)
+        kwargs.setdefault('transport', transport)
+        super().__init__(limits=limits, http2=http2, verify=verify, *args, **kwargs)
         self.dns_ttl = dns_ttl
-        
+        # 注解加引号: aiodns未安装时不能在运行时求值
+        self._resolver: Optional["aiodns.DNSResolver"] = None  # 需要运行中的事件循环, 惰性创建
+        self._inflight: Dict[str, asyncio.Future] = {}  # 在途解析, 按主机名合并
+        # GET条件请求缓存: url -> (etag, last_modified, headers, body)
+        self._etag_cache_size = etag_cache_size
+        self._etag_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # 拦截器存元组: 注册是冷路径, 热路径迭代元组更快且天然不可变
+        self.request_interceptors: tuple = ()
+        self.response_interceptors: tuple = ()
+        # 根路径拼接的前缀预先算好, 常见形状不走urljoin
+        self._base_prefix = str(self.base_url).rstrip('/') if self.base_url else ''
+
         # 初始化全局缓存管理器（只初始化一次）
         if HttpClient._dns_cache is None:
             HttpClient._dns_cache = PersistentDNSCache(dns_cache_db)
             HttpClient._dns_cache.cleanup_expired()  # 启动时清理过期缓存
-        
-        # 初始化全局锁
-        if HttpClient._global_lock is None:
-            HttpClient._global_lock = asyncio.Lock()
-        
+
         stats = self._dns_cache.get_stats()
-        logger.info(f"✅ HttpClient 初始化完成 (缓存: {stats['valid_entries']}/{stats['total_cached']} 条有效)")
+        self.logger.info("✅ HttpClient 初始化完成 (缓存: %d/%d 条有效)", stats['valid_entries'], stats['total_cached'])
     
     async def _resolve_dns(self, hostname: str) -> Optional[str]:
-        """解析 DNS（使用持久化缓存）"""
-        async with self._global_lock:
-            # 检查缓存
-            ip = self._dns_cache.get(hostname)
-            if ip:
-                return ip
-            
+        """解析 DNS（使用持久化缓存）
+
+        缓存命中路径完全无锁(纯内存读); 同一主机名的并发miss合并成
+        一次查询(single-flight), 不同主机名并行解析, 不再整体串行
+        """
+        # 检查缓存
+        ip = self._dns_cache.get(hostname)
+        if ip:
+            return ip
+
+        # 同主机名已有解析在途: 等它的结果, 不发第二次查询
+        future = self._inflight.get(hostname)
+        if future is not None:
+            # shield: 某个等待方被取消时不连带取消共享的future
+            return await asyncio.shield(future)
+
+        # 原生异步解析: 不占线程池线程, 查询直接挂在事件循环上
+        if aiodns is not None and self._resolver is None:
+            self._resolver = aiodns.DNSResolver()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[hostname] = future
+        ip = None
+        try:
             # DNS 解析（带重试）
             for attempt in range(3):
                 try:
-                    loop = asyncio.get_event_loop()
-                    ip = await loop.run_in_executor(None, socket.gethostbyname, hostname)
-                    
+                    if self._resolver is not None:
+                        result = await self._resolver.gethostbyname(hostname, socket.AF_INET)
+                        if not result.addresses:
+                            raise socket.gaierror(socket.EAI_NONAME, hostname)
+                        ip = result.addresses[0]
+                    else:
+                        # aiodns未装时的降级路径: to_thread替代
+                        # get_event_loop+run_in_executor的旧写法
+                        ip = await asyncio.to_thread(socket.gethostbyname, hostname)
+
                     # 存入持久化缓存
                     self._dns_cache.set(hostname, ip, self.dns_ttl)
-                    logger.info(f"🔍 DNS 解析成功: {hostname} -> {ip}")
-                    return ip
-                
-                except socket.gaierror:
-                    logger.warning(f"❌ DNS 解析失败 (尝试 {attempt+1}/3): {hostname}")
+                    self.logger.info("🔍 DNS 解析成功: %s -> %s", hostname, ip)
+                    break
+
+                except _DNS_ERRORS:
+                    self.logger.warning("❌ DNS 解析失败 (尝试 %d/3): %s", attempt + 1, hostname)
                     if attempt < 2:
                         await asyncio.sleep(2 ** attempt)
-            
-            return None
+
+            return ip
+        finally:
+            self._inflight.pop(hostname, None)
+            if not future.done():
+                future.set_result(ip)
     
-    async def request(self, method: str, url: str, max_retries: int = 3, 
-                     retry_delay: float = 1.0, **kwargs) -> httpx.Response:
-        """发送 HTTP 请求（带自动重试）"""
-        from urllib.parse import urlparse, urlunparse
-        
-        parsed = urlparse(url)
-        hostname = parsed.hostname
-        
-        # DNS 解析
-        ip = await self._resolve_dns(hostname)
-        if not ip:
-            logger.error(f"❌ DNS 解析失败，使用原始 URL: {url}")
-            target_url = url
-        else:
-            # 替换主机名为 IP
-            target_url = urlunparse((
-                parsed.scheme,
-                f"{ip}:{parsed.port}" if parsed.port else ip,
-                parsed.path,
-                parsed.params,
-                parsed.query,
-                parsed.fragment
-            ))
-            # 设置 Host 头
-            if 'headers' not in kwargs:
-                kwargs['headers'] = {}
-            kwargs['headers']['Host'] = hostname
-        
+    async def request(self, method: str, url: str, max_retries: int = 3,
+                     retry_delay: float = 1.0, max_retry_delay: float = 30.0,
+                     **kwargs) -> httpx.Response:
+        """发送 HTTP 请求（带自动重试）
+
+        DNS 改写在 DNSCacheTransport 里完成, 这里只管重试:
+        网络错误重试所有方法; 5xx/429只对幂等方法重试并尊重Retry-After
+        """
+        # 相对路径提前拼好, 绕开httpx每次请求的merge_url重组;
+        # 绝对URL原样透传
+        url = self._prepare_url(url)
+
+        # 拦截器可改写方法/URL/kwargs; 没注册时零开销跳过
+        if self.request_interceptors:
+            for fn in self.request_interceptors:
+                method, url, kwargs = fn(method, url, kwargs)
+
+        # None值的kwargs传进httpx也要逐个走合并逻辑, 先一次性剔除
+        if any(v is None for v in kwargs.values()):
+            kwargs = {k: v for k, v in kwargs.items() if v is not None}
+
+        # 循环不变量提出来, 每次重试不再重算
+        is_idempotent = method.upper() in _IDEMPOTENT_METHODS
+        url_brief = url[:80]
+
+        # 命中过的GET带上条件头, 资源未变时服务端只回304不回正文
+        cache_key = None
+        if self._etag_cache_size and method.upper() == 'GET':
+            cache_key = url
+            entry = self._etag_cache.get(url)
+            if entry is not None:
+                headers = kwargs.setdefault('headers', {})
+                if entry[0]:
+                    headers.setdefault('If-None-Match', entry[0])
+                if entry[1]:
+                    headers.setdefault('If-Modified-Since', entry[1])
+
         # 重试逻辑
         last_error = None
         for attempt in range(max_retries):
             try:
-                logger.info(f"🚀 发送请求 (尝试 {attempt+1}/{max_retries}): {method} {target_url[:80]}...")
-                response = await super().request(method, target_url, **kwargs)
-                logger.info(f"✅ 请求成功: {response.status_code}")
+                self.logger.info("🚀 发送请求 (尝试 %d/%d): %s %s...", attempt + 1, max_retries, method, url_brief)
+                response = await super().request(method, url, **kwargs)
+
+                if (response.status_code in _RETRIABLE_STATUS
+                        and is_idempotent
+                        and attempt < max_retries - 1):
+                    delay = _backoff_delay(attempt, retry_delay, max_retry_delay)
+                    retry_after = response.headers.get('Retry-After')
+                    if retry_after and retry_after.isdigit():
+                        delay = min(float(retry_after), max_retry_delay)
+                    self.logger.warning("⚠️ 状态码 %d, %.1f 秒后重试...", response.status_code, delay)
+                    await asyncio.sleep(delay)
+                    continue
+
+                if cache_key is not None:
+                    if response.status_code == 304:
+                        entry = self._etag_cache.get(cache_key)
+                        if entry is not None:
+                            # 未修改: 用缓存正文拼回200响应, 省掉整个响应体
+                            self._etag_cache.move_to_end(cache_key)
+                            self.logger.info("♻️ 304 未修改, 命中ETag缓存: %s", url_brief)
+                            cached = httpx.Response(200, headers=entry[2],
+                                                    content=entry[3],
+                                                    request=response.request)
+                            if self.response_interceptors:
+                                cached = await self._apply_response_interceptors(cached)
+                            return cached
+                    elif response.status_code == 200:
+                        self._cache_etag(cache_key, response)
+
+                self.logger.info("✅ 请求成功: %d", response.status_code)
+                if self.response_interceptors:
+                    response = await self._apply_response_interceptors(response)
                 return response
-            
-            except (httpx.TimeoutException, httpx.ConnectError, httpx.RemoteProtocolError) as e:
+
+            except (httpx.TimeoutException, httpx.ConnectError,
+                    httpx.RemoteProtocolError, httpx.HTTPStatusError) as e:
+                # 网络错误没有response属性, 只有HTTPStatusError才有:
+                # 用getattr探测, 不能让AttributeError吃掉真正的异常
+                resp = getattr(e, 'response', None)
+                if resp is not None and not (resp.status_code in _RETRIABLE_STATUS
+                                             and is_idempotent):
+                    # 4xx等非暂时性状态码重试没意义, 原样抛给调用方
+                    raise
                 last_error = e
-                logger.warning(f"⚠️ 请求失败 (尝试 {attempt+1}/{max_retries}): {e}")
-                
+                self.logger.warning("⚠️ 请求失败 (尝试 %d/%d): %s", attempt + 1, max_retries, e)
+
                 if attempt < max_retries - 1:
-                    delay = retry_delay * (2 ** attempt)
-                    logger.info(f"⏳ 等待 {delay} 秒后重试...")
+                    delay = _backoff_delay(attempt, retry_delay, max_retry_delay)
+                    self.logger.info("⏳ 等待 %.1f 秒后重试...", delay)
                     await asyncio.sleep(delay)
         
-        logger.error(f"❌ 请求最终失败: {last_error}")
+        self.logger.error("❌ 请求最终失败: %s", last_error)
         raise last_error
     
+    def add_request_interceptor(self, interceptor):
+        """注册请求拦截器: fn(method, url, kwargs) -> (method, url, kwargs)"""
+        self.request_interceptors = self.request_interceptors + (interceptor,)
+
+    def add_response_interceptor(self, interceptor):
+        """注册响应拦截器: fn(response) -> response, 同步/async均可"""
+        # 是否协程在注册时判定一次, 每个响应不再做iscoroutinefunction探测
+        entry = (interceptor, inspect.iscoroutinefunction(interceptor))
+        self.response_interceptors = self.response_interceptors + (entry,)
+
+    async def _apply_response_interceptors(self, response: httpx.Response) -> httpx.Response:
+        for fn, is_async in self.response_interceptors:
+            response = await fn(response) if is_async else fn(response)
+        return response
+
+    def _cache_etag(self, url: str, response: httpx.Response):
+        """缓存200响应的校验头和正文, 供下次条件请求复用"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        if 'no-store' in response.headers.get('Cache-Control', ''):
+            return
+        cache = self._etag_cache
+        old = cache.get(url)
+        # gzip/多节点的'-xxx'后缀不同但内容一致, 规范化后相同就不重写正文
+        if (old is not None and etag and old[0]
+                and normalize_etag(etag) == normalize_etag(old[0])):
+            cache.move_to_end(url)
+            return
+        # 正文存的是解码后的bytes: 带着Content-Encoding回放会让httpx对
+        # 已解码数据再gunzip一次(DecodingError); 长度/传输编码头同样
+        # 不再匹配存下的正文, 一并剔除
+        stored_headers = {k: v for k, v in response.headers.items()
+                          if k.lower() not in ('content-encoding', 'content-length',
+                                               'transfer-encoding')}
+        cache[url] = (etag, last_modified, stored_headers, response.content)
+        cache.move_to_end(url)
+        while len(cache) > self._etag_cache_size:
+            cache.popitem(last=False)
+
+    async def request_many(self, specs: list, concurrency: int = 32) -> list:
+        """并发批量请求
+
+        gather把N次独立请求的RTT摊平成一轮; 信号量限并发, 不让一次
+        批量把连接池或对端打满. 结果顺序与specs一致, 单个请求失败时
+        以异常对象占位, 不中断其余请求
+
+        Args:
+            specs: 每个请求的参数dict, 形如 {'method': 'GET', 'url': ...}
+            concurrency: 并发上限
+
+        Returns:
+            list: 按specs顺序的Response或异常对象
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(spec):
+            async with sem:
+                return await self.request(**spec)
+
+        return await asyncio.gather(*(one(s) for s in specs), return_exceptions=True)
+
+    async def download_file(self, url: str, file_path: str,
+                            chunk_size: int = 65536, **kwargs) -> str:
+        """流式下载到文件
+
+        stream逐块收包, 内存占用O(块)而不是O(文件), 大文件不再整体
+        读进内存再落盘; aiter_raw跳过httpx的自动解码, 服务端未压缩时
+        少一次拷贝
+
+        Args:
+            url: 下载地址
+            file_path: 保存路径
+            chunk_size: 每块字节数, 默认64KB贴合socket缓冲
+
+        Returns:
+            str: 保存路径
+        """
+        async with self.stream('GET', url, **kwargs) as response:
+            response.raise_for_status()
+            # 原始流只有未压缩时能直写; gzip等编码要走解码迭代,
+            # 否则落盘的是压缩字节
+            encoding = response.headers.get('Content-Encoding', 'identity')
+            chunks = (response.aiter_raw(chunk_size) if encoding in ('identity', '')
+                      else response.aiter_bytes(chunk_size))
+            # 打开/写盘都放线程池: 慢盘不卡事件循环, 其他协程照常推进.
+            # buffering=0: 块本来就是64KB整块, 不再经过一层Python缓冲拷贝
+            f = await asyncio.to_thread(open, file_path, 'wb', 0)
+            try:
+                # 热循环里的属性查找提前绑定成局部变量
+                write = f.write
+                to_thread = asyncio.to_thread
+                async for chunk in chunks:
+                    await to_thread(write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+        self.logger.info("✅ 下载完成: %s -> %s", url[:80], file_path)
+        return file_path
+
+    def _prepare_url(self, url: str) -> str:
+        """相对路径拼上base_url
+
+        '/xxx'形式的绝对路径直接字符串拼接(一次C层concat);
+        其余少见形状回退LRU缓存的urljoin
+        """
+        if not self.base_url or url.startswith(('http://', 'https://')):
+            return url
+        if url.startswith('/') and self._base_prefix:
+            return self._base_prefix + url
+        return _join_url(str(self.base_url), url)
+
+    async def warmup(self, path: str = '/', concurrency: int = 1):
+        """预热连接池: 应用启动时调用, 把TLS握手/H2协商提前付掉
+
+        首个真实请求省下一次RTT+握手; concurrency>1时并行预开
+        多条保活连接, 把池真正灌满
+        """
+        url = self._prepare_url(path)
+
+        async def one():
+            try:
+                await super(HttpClient, self).request('HEAD', url, timeout=5.0)
+            except Exception:
+                # 预热失败无所谓, 真实请求自己会建连接
+                pass
+
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+
+    async def fast_get(self, url: str, **kwargs) -> httpx.Response:
+        """极简GET: 跳过重试/拦截器/ETag缓存的整套调度
+
+        稳态成功路径少跑几十条字节码, 适合调用方自己兜底失败的
+        高QPS场景; DNS缓存仍在传输层生效
+        """
+        return await super().request('GET', self._prepare_url(url), **kwargs)
+
     # 便捷方法
     async def get(self, url: str, **kwargs):
         return await self.request("GET", url, **kwargs)
@@ -278,3 +619,34 @@ class HttpClient(httpx.AsyncClient):
         if cls._dns_cache:
             return cls._dns_cache.get_stats()
         return {"total_cached": 0, "valid_entries": 0, "expired_entries": 0, "domains": {}}
+
+
+# 进程级共享客户端: 逐请求new一个客户端是常见反模式, 每次都付
+# 连接池冷启动+TLS握手; 相同配置复用同一实例, 池一直是热的
+_CLIENT_REGISTRY: Dict[tuple, HttpClient] = {}
+
+
+def get_async_client(**kwargs) -> HttpClient:
+    """按配置取共享的 HttpClient, 没有就创建
+
+    Args:
+        **kwargs: 透传给 HttpClient 的构造参数(值需可哈希)
+
+    Returns:
+        HttpClient: 该配置对应的进程级单例
+    """
+    key = tuple(sorted(kwargs.items()))
+    client = _CLIENT_REGISTRY.get(key)
+    if client is None:
+        if _CLIENT_REGISTRY:
+            logger.warning("⚠️ 已存在 %d 个共享客户端, 新配置会再建一个连接池", len(_CLIENT_REGISTRY))
+        client = HttpClient(**kwargs)
+        _CLIENT_REGISTRY[key] = client
+    return client
+
+
+async def aclose_clients():
+    """关闭所有共享客户端(进程收尾时调用)"""
+    for client in _CLIENT_REGISTRY.values():
+        await client.aclose()
+    _CLIENT_REGISTRY.clear()